@@ -16,10 +16,23 @@ if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
     host = os.getenv("HOST", "0.0.0.0")
     reload = os.getenv("RELOAD", "true").lower() == "true"
+    # Worker processes only apply when reload is disabled (uvicorn cannot combine the two)
+    workers = None if reload else int(os.getenv("WORKERS", os.cpu_count() or 1))
+    # Only trust X-Forwarded-* headers when running behind a reverse proxy
+    proxy_headers = os.getenv("PROXY_HEADERS", "false").lower() == "true"
+    access_log = os.getenv("ACCESS_LOG", "false").lower() == "true"
     
     uvicorn.run(
         "src.main:app",
         host=host,
         port=port,
-        reload=reload
+        reload=reload,
+        workers=workers,
+        loop="auto",  # uvloop when installed (uvicorn[standard] on Linux/macOS), asyncio otherwise
+        http="auto",  # httptools when installed, h11 otherwise
+        access_log=access_log,
+        proxy_headers=proxy_headers,
+        forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS") if proxy_headers else None,
+        server_header=False,
+        log_config=None  # Keep the logging configured in src/main.py
     )
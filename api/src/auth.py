@@ -1,9 +1,11 @@
 """
 Authentication module for Supabase JWT token validation.
 
-This module handles authentication using Supabase JWT tokens. It uses Supabase's
-built-in auth client to validate tokens, which properly handles all JWT validation
-including signature, expiration, and audience checks.
+This module handles authentication using Supabase JWT tokens. Tokens signed with
+an asymmetric key (RS256/ES256) are verified locally against the project's JWKS
+(signature, expiration, audience, and issuer checks), so no network call is needed per
+token. Tokens signed with the legacy shared secret (HS256) fall back to Supabase's
+built-in auth client.
 
 Usage:
     For protected endpoints, use `require_auth` as a dependency:
@@ -20,17 +22,16 @@ Usage:
         ...
     ```
     
-    For optional authentication, use `get_user_id_from_token`:
+    For optional authentication, use `get_optional_user_id` as a dependency:
     
     ```python
-    from src.auth import get_user_id_from_token
+    from src.auth import get_optional_user_id
     
     @router.get("/public")
     async def public_endpoint(
-        authorization: Optional[str] = Header(None),
+        user_id: Optional[UUID] = Depends(get_optional_user_id),
         db: Client = Depends(get_db_client)
     ):
-        user_id = get_user_id_from_token(authorization)
         if user_id:
             # User is authenticated
         else:
@@ -38,23 +39,171 @@ Usage:
         ...
     ```
 """
+import base64
+import hashlib
+import json
 import logging
-from typing import Optional
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 from uuid import UUID
-from fastapi import HTTPException, Header, status
+import httpx
+import jwt
+from fastapi import Depends, HTTPException, Header, status
 from src.database import get_supabase_client
 
 logger = logging.getLogger(__name__)
 
+# Process-local cache of validated tokens: sha256(token) -> (user_id, exp epoch seconds)
+# Avoids a round-trip to Supabase auth for every authenticated request.
+# Raw tokens are never stored; entries are dropped once the token expires.
+TOKEN_CACHE_MAX_SIZE = 10000
+TOKEN_CACHE_EXPIRY_SKEW_SECONDS = 30
+_token_cache: "OrderedDict[bytes, Tuple[UUID, float]]" = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+# Signing keys from the project's JWKS endpoint, keyed by kid.
+# Fetched on first use and refreshed lazily when a token presents an unknown kid.
+JWKS_ALGORITHMS = ["RS256", "ES256"]
+JWKS_MIN_REFRESH_INTERVAL_SECONDS = 60
+JWT_AUDIENCE = "authenticated"
+_jwks_keys: Dict[str, jwt.PyJWK] = {}
+_jwks_fetched_at = 0.0
+_jwks_lock = threading.Lock()
+
+
+def _get_token_expiry(token: str) -> Optional[float]:
+    """
+    Read the exp claim from a JWT payload without verifying it.
+    Only used for cache expiry after Supabase has already validated the token.
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        return float(exp) if exp is not None else None
+    except (IndexError, ValueError, TypeError, AttributeError):
+        return None
+
+
+def _get_cached_user_id(cache_key: bytes) -> Optional[UUID]:
+    """Return the cached user_id for a token if present and not about to expire."""
+    with _token_cache_lock:
+        entry = _token_cache.get(cache_key)
+        if entry is None:
+            return None
+        user_id, exp = entry
+        if time.time() >= exp - TOKEN_CACHE_EXPIRY_SKEW_SECONDS:
+            del _token_cache[cache_key]
+            return None
+        _token_cache.move_to_end(cache_key)
+        return user_id
+
+
+def _cache_user_id(cache_key: bytes, user_id: UUID, exp: float) -> None:
+    """Store a validated token's user_id, evicting the least recently used entries when full."""
+    with _token_cache_lock:
+        _token_cache[cache_key] = (user_id, exp)
+        _token_cache.move_to_end(cache_key)
+        while len(_token_cache) > TOKEN_CACHE_MAX_SIZE:
+            _token_cache.popitem(last=False)
+
+
+def _jwt_issuer() -> str:
+    """Issuer claim Supabase Auth puts in this project's access tokens."""
+    return f"{os.getenv('SUPABASE_URL', '').rstrip('/')}/auth/v1"
+
+
+def _fetch_jwks() -> Dict[str, jwt.PyJWK]:
+    """Fetch the Supabase project's JSON Web Key Set and index usable keys by kid."""
+    supabase_url = os.getenv("SUPABASE_URL", "").rstrip("/")
+    supabase_key = os.getenv("SUPABASE_KEY") or os.getenv("SUPABASE_ANON_KEY") or ""
+    response = httpx.get(
+        f"{supabase_url}/auth/v1/.well-known/jwks.json",
+        headers={"apikey": supabase_key},
+        timeout=5.0
+    )
+    response.raise_for_status()
+    
+    keys = {}
+    for jwk_data in response.json().get("keys", []):
+        kid = jwk_data.get("kid")
+        if not kid:
+            continue
+        try:
+            keys[kid] = jwt.PyJWK(jwk_data)
+        except jwt.PyJWKError as e:
+            logger.warning(f"Skipping unusable JWKS key {kid}: {e}")
+    return keys
+
+
+def _get_jwk_for_kid(kid: Optional[str]) -> Optional[jwt.PyJWK]:
+    """
+    Return the signing key for a kid, refreshing the JWKS if the kid is unknown.
+    Refreshes are rate-limited so tokens with bogus kids cannot trigger a fetch per request.
+    """
+    global _jwks_keys, _jwks_fetched_at
+    if not kid:
+        return None
+    
+    jwk = _jwks_keys.get(kid)
+    if jwk is not None:
+        return jwk
+    
+    with _jwks_lock:
+        jwk = _jwks_keys.get(kid)
+        if jwk is not None:
+            return jwk
+        if time.time() - _jwks_fetched_at < JWKS_MIN_REFRESH_INTERVAL_SECONDS:
+            return None
+        _jwks_fetched_at = time.time()
+        try:
+            _jwks_keys = _fetch_jwks()
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(f"Failed to fetch JWKS from Supabase: {e}")
+        return _jwks_keys.get(kid)
+
+
+def _verify_token_with_supabase(token: str) -> Optional[UUID]:
+    """
+    Validate a token by calling Supabase's auth API.
+    Used for tokens signed with the legacy shared secret (HS256), which cannot be
+    verified against the JWKS.
+    """
+    try:
+        supabase = get_supabase_client()
+        user_response = supabase.auth.get_user(token)
+    except Exception as e:
+        logger.debug(f"JWT token validation via Supabase failed: {e}")
+        return None
+    
+    if not user_response or not user_response.user:
+        logger.debug("Token validation failed: No user returned from Supabase")
+        return None
+    
+    # Extract user_id from the verified user object
+    user_id = user_response.user.id
+    try:
+        return UUID(user_id)
+    except (ValueError, TypeError) as e:
+        logger.error(f"Invalid user_id format from token: {user_id}, error: {e}")
+        return None
+
 
 def get_user_id_from_token(authorization: Optional[str] = Header(None)) -> Optional[UUID]:
     """
     Extract and validate user_id from Supabase JWT token in Authorization header.
     
-    This function validates the token using Supabase's auth client, which ensures
-    the token is valid, not expired, and properly signed. Returns None if token
+    Asymmetrically signed tokens are verified locally against the cached JWKS;
+    legacy HS256 tokens are validated using Supabase's auth client. Either way the
+    token must be valid, not expired, and properly signed. Returns None if token
     is missing or invalid (for optional authentication).
     
+    Successfully validated tokens are cached in-process until they expire, so
+    repeated requests with the same token skip verification entirely.
+    
     Args:
         authorization: Authorization header value (should be "Bearer <token>")
         
@@ -65,46 +214,87 @@ def get_user_id_from_token(authorization: Optional[str] = Header(None)) -> Optio
         return None
     
     # Extract token from "Bearer <token>" format
-    if authorization.startswith("Bearer "):
-        token = authorization[7:].strip()
-    else:
-        # Try without Bearer prefix (for backward compatibility)
-        token = authorization.strip()
+    # (a bare token without the Bearer prefix is also accepted for backward compatibility)
+    token = authorization.removeprefix("Bearer ").strip()
     
     if not token:
         return None
     
+    cache_key = hashlib.sha256(token.encode()).digest()
+    cached_user_id = _get_cached_user_id(cache_key)
+    if cached_user_id is not None:
+        return cached_user_id
+    
     try:
-        # Use Supabase auth client to verify the token
-        # This properly validates signature, expiration, and audience
-        supabase = get_supabase_client()
-        user_response = supabase.auth.get_user(token)
-        
-        if not user_response or not user_response.user:
-            logger.debug("Token validation failed: No user returned from Supabase")
-            return None
-        
-        # Extract user_id from the verified user object
-        user_id = user_response.user.id
-        
-        try:
-            return UUID(user_id)
-        except (ValueError, TypeError) as e:
-            logger.error(f"Invalid user_id format from token: {user_id}, error: {e}")
-            return None
-            
-    except Exception as e:
-        error_str = str(e).lower()
-        if "expired" in error_str or "exp" in error_str:
-            logger.debug(f"JWT token expired: {e}")
-        elif "invalid" in error_str or "jwt" in error_str or "token" in error_str:
-            logger.debug(f"JWT token validation failed: {e}")
-        else:
-            logger.warning(f"Unexpected error validating token: {e}")
+        header = jwt.get_unverified_header(token)
+    except jwt.PyJWTError as e:
+        logger.debug(f"JWT token validation failed: {e}")
         return None
+    
+    if header.get("alg") not in JWKS_ALGORITHMS:
+        # Legacy HS256 token - let Supabase validate it
+        user_uuid = _verify_token_with_supabase(token)
+        # Cache until the token expires (tokens without exp are not cached)
+        exp = _get_token_expiry(token)
+        if user_uuid is not None and exp is not None:
+            _cache_user_id(cache_key, user_uuid, exp)
+        return user_uuid
+    
+    jwk = _get_jwk_for_kid(header.get("kid"))
+    if jwk is None:
+        logger.debug(f"JWT token validation failed: unknown signing key {header.get('kid')}")
+        return None
+    
+    try:
+        # Verifies signature, expiration, audience, and issuer locally. Passing the PyJWK
+        # (not its raw key) and only its own algorithm means the token header cannot pick
+        # an algorithm that does not belong to the key.
+        claims = jwt.decode(
+            token,
+            key=jwk,
+            algorithms=[jwk.algorithm_name],
+            audience=JWT_AUDIENCE,
+            issuer=_jwt_issuer(),
+            options={"require": ["exp", "sub", "iss"]}
+        )
+    except jwt.ExpiredSignatureError as e:
+        logger.debug(f"JWT token expired: {e}")
+        return None
+    except jwt.PyJWTError as e:
+        logger.debug(f"JWT token validation failed: {e}")
+        return None
+    
+    user_id = claims["sub"]
+    try:
+        user_uuid = UUID(user_id)
+    except (ValueError, TypeError) as e:
+        logger.error(f"Invalid user_id format from token: {user_id}, error: {e}")
+        return None
+    
+    _cache_user_id(cache_key, user_uuid, float(claims["exp"]))
+    return user_uuid
 
 
-def require_auth(authorization: Optional[str] = Header(None)) -> UUID:
+def get_optional_user_id(authorization: Optional[str] = Header(None)) -> Optional[UUID]:
+    """
+    Dependency returning the authenticated user's id, or None for anonymous requests.
+    
+    FastAPI caches dependency results per request, so `require_auth` and any other
+    dependency or endpoint using this share a single token verification.
+    
+    Args:
+        authorization: Authorization header value (should be "Bearer <token>")
+        
+    Returns:
+        UUID of the user if token is valid, None otherwise
+    """
+    return get_user_id_from_token(authorization)
+
+
+def require_auth(
+    authorization: Optional[str] = Header(None),
+    user_id: Optional[UUID] = Depends(get_optional_user_id)
+) -> UUID:
     """
     Dependency function that requires valid authentication.
     Raises 401 if authentication is missing or invalid.
@@ -125,6 +315,7 @@ def require_auth(authorization: Optional[str] = Header(None)) -> UUID:
     
     Args:
         authorization: Authorization header value (should be "Bearer <token>")
+        user_id: User id resolved by `get_optional_user_id` for this request
         
     Returns:
         UUID of the authenticated user
@@ -139,8 +330,6 @@ def require_auth(authorization: Optional[str] = Header(None)) -> UUID:
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user_id = get_user_id_from_token(authorization)
-    
     if not user_id:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,29 @@
+"""
+Cache-Control helpers for public, read-mostly endpoints.
+"""
+from fastapi import Response
+
+
+def public_cache(max_age: int, stale_while_revalidate: int = 0):
+    """
+    Build a route dependency that marks successful responses as publicly cacheable.
+
+    Responses marked this way also get an ETag (see ETagMiddleware in src.main), so
+    clients and CDNs can revalidate with If-None-Match and receive 304 Not Modified.
+    Error responses are built separately by the exception handlers and never carry
+    the header.
+
+    Usage:
+
+    ```python
+    @router.get("/{group_id}", dependencies=[Depends(public_cache(3600))])
+    ```
+    """
+    header_value = f"public, max-age={max_age}"
+    if stale_while_revalidate:
+        header_value += f", stale-while-revalidate={stale_while_revalidate}"
+
+    def set_cache_control(response: Response) -> None:
+        response.headers["Cache-Control"] = header_value
+
+    return set_cache_control
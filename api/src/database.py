@@ -1,9 +1,13 @@
 """
 Database connection module.
 """
-from supabase import create_client, Client
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from fastapi import Request
+from supabase import create_client, Client, ClientOptions
+import asyncio
+import httpx
 import os
-from functools import lru_cache
 from dotenv import load_dotenv
 
 # Load environment variables from .env file (if present)
@@ -13,11 +17,50 @@ from dotenv import load_dotenv
 # 2. .env file (for local development)
 load_dotenv(override=False)  # override=False means env vars take precedence
 
+# Connection pool settings for outbound requests to Supabase (PostgREST and auth)
+SUPABASE_HTTP_TIMEOUT = float(os.getenv("SUPABASE_HTTP_TIMEOUT", 10.0))
+SUPABASE_HTTP_MAX_CONNECTIONS = int(os.getenv("SUPABASE_HTTP_MAX_CONNECTIONS", 200))
+SUPABASE_HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("SUPABASE_HTTP_MAX_KEEPALIVE_CONNECTIONS", 100))
+SUPABASE_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_HTTP_KEEPALIVE_EXPIRY", 60.0))
 
-@lru_cache()
-def get_supabase_client() -> Client:
+# Maximum number of Supabase queries in flight at once per worker (see run_query)
+SUPABASE_QUERY_THREADS = int(os.getenv("SUPABASE_QUERY_THREADS", 64))
+
+# Process-wide singletons, created once at application startup (see init_supabase_client)
+_http_client: Optional[httpx.Client] = None
+_supabase_client: Optional[Client] = None
+
+# Dedicated threads for blocking Supabase calls. asyncio's default executor is capped at
+# min(32, cpu_count + 4) threads, which would queue concurrent queries on small machines.
+# Threads are only started as they are needed.
+_query_executor = ThreadPoolExecutor(
+    max_workers=SUPABASE_QUERY_THREADS,
+    thread_name_prefix="supabase-query",
+)
+
+
+def _create_http_client() -> httpx.Client:
+    """
+    Create the shared HTTP client used for all Supabase requests.
+    Keeps a bounded pool of keep-alive connections and uses HTTP/2 so concurrent
+    queries (run from worker threads by run_query) are multiplexed over existing
+    connections instead of paying a TCP+TLS handshake each.
     """
-    Create and return a Supabase client instance.
+    return httpx.Client(
+        http2=True,
+        timeout=SUPABASE_HTTP_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=SUPABASE_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=SUPABASE_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=SUPABASE_HTTP_KEEPALIVE_EXPIRY,
+        ),
+        follow_redirects=True,
+    )
+
+
+def _create_supabase_client(http_client: httpx.Client) -> Client:
+    """
+    Create a Supabase client instance.
     Uses SUPABASE_KEY (service_role) which bypasses RLS for backend API access.
     This is required for backend APIs to access all data regardless of RLS policies.
     Falls back to SUPABASE_ANON_KEY only if SUPABASE_KEY is not set (for backward compatibility).
@@ -42,12 +85,67 @@ def get_supabase_client() -> Client:
             UserWarning
         )
     
-    return create_client(supabase_url, supabase_key)
+    return create_client(
+        supabase_url,
+        supabase_key,
+        options=ClientOptions(httpx_client=http_client)
+    )
 
 
-def get_db_client() -> Client:
+def init_supabase_client() -> Client:
+    """
+    Create the shared HTTP client and Supabase client if they don't exist yet.
+    Called from the application lifespan on startup.
+    """
+    global _http_client, _supabase_client
+    if _supabase_client is None:
+        _http_client = _create_http_client()
+        _supabase_client = _create_supabase_client(_http_client)
+    return _supabase_client
+
+
+def close_supabase_client() -> None:
+    """
+    Close the shared HTTP connection pool and drop the Supabase client.
+    Called from the application lifespan on shutdown.
+    """
+    global _http_client, _supabase_client
+    if _http_client is not None:
+        _http_client.close()
+    _http_client = None
+    _supabase_client = None
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Return the shared HTTP client used for all Supabase requests.
+    """
+    if _http_client is None:
+        init_supabase_client()
+    return _http_client
+
+
+def get_supabase_client() -> Client:
+    """
+    Return the shared Supabase client instance.
+    Falls back to creating it on first use when called outside the application
+    lifespan (e.g. from scripts).
+    """
+    return _supabase_client or init_supabase_client()
+
+
+def get_db_client(request: Request) -> Client:
     """
     Dependency function for FastAPI to get database client.
+    Returns the client created at startup, so no cache lookup or lock is involved per request.
     """
-    return get_supabase_client()
+    return request.app.state.db
 
+
+async def run_query(query):
+    """
+    Execute a Supabase query builder in a worker thread and return its response.
+    The supabase-py client is synchronous, so calling .execute() directly inside
+    an async endpoint would block the event loop for the whole round-trip.
+    """
+    return await asyncio.get_running_loop().run_in_executor(_query_executor, query.execute)
@@ -1,16 +1,19 @@
 """
 FastAPI application main module.
 """
+import hashlib
 import logging
 import os
 import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, status
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from dotenv import load_dotenv
+from src.database import init_supabase_client, close_supabase_client
 from src.routers import (
     categories,
     groups,
@@ -65,83 +68,295 @@ else:
         "For production, set CORS_ORIGINS in environment variables or .env file"
     )
 
+INDEX_HTML_PATH = "src/static/index.html"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create the shared Supabase client on startup and close its connection pool on shutdown.
+    Also loads the documentation page into memory so `/` is served without disk I/O,
+    and runs the background task that batches feedback inserts.
+    """
+    app.state.db = init_supabase_client()
+    with open(INDEX_HTML_PATH, "rb") as f:
+        app.state.index_html = f.read()
+    app.state.index_etag = f'"{hashlib.md5(app.state.index_html).hexdigest()}"'
+    feedback.start_feedback_flusher(app.state.db)
+    yield
+    await feedback.stop_feedback_flusher()
+    close_supabase_client()
+
+
 app = FastAPI(
     title="TCGHermit API",
     description="Backend API for card deck building and trading app",
     version="1.0.0",
-    redirect_slashes=False  # Disable automatic redirects for trailing slashes
+    redirect_slashes=False,  # Disable automatic redirects for trailing slashes
+    default_response_class=ORJSONResponse,  # orjson serializes large list responses much faster than stdlib json
+    lifespan=lifespan
 )
 
+
+class ETagMiddleware:
+    """
+    Adds a weak ETag to successful GET responses that an endpoint marked as publicly
+    cacheable (Cache-Control: public ...) and that do not already carry an ETag, and
+    answers matching If-None-Match requests with 304 Not Modified.
+
+    Only those responses are buffered and hashed; everything else streams through
+    untouched. Registered first so it sits inside the other middleware and hashes
+    the body before any content encoding is applied.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        body_parts = []
+
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", ())
+                # Responses that set their own ETag (e.g. the docs page) are passed through untouched
+                cacheable = (
+                    message["status"] == 200
+                    and any(name == b"cache-control" and value.startswith(b"public") for name, value in headers)
+                    and not any(name == b"etag" for name, _ in headers)
+                )
+                if not cacheable:
+                    await send(message)
+                    return
+                start_message = message
+                return
+
+            if start_message is None:
+                await send(message)
+                return
+
+            body_parts.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(body_parts)
+            # Weak tag: GZipMiddleware may compress the body afterwards, and the gzip and
+            # identity representations must not share a strong validator
+            opaque_tag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'.encode("latin-1")
+            headers = [*start_message.get("headers", ()), (b"etag", b"W/" + opaque_tag)]
+
+            if opaque_tag in _if_none_match_tags(scope):
+                # Keep CORS and caching headers; drop the ones describing the omitted body
+                headers = [
+                    (name, value) for name, value in headers
+                    if name not in (b"content-length", b"content-type")
+                ]
+                await send({"type": "http.response.start", "status": 304, "headers": headers})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            await send({**start_message, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _if_none_match_tags(scope) -> frozenset:
+    """Entity tags listed in the request's If-None-Match header, with any weak W/ prefix removed."""
+    for name, value in scope["headers"]:
+        if name == b"if-none-match":
+            return frozenset(tag.strip().removeprefix(b"W/") for tag in value.split(b","))
+    return frozenset()
+
+
+app.add_middleware(ETagMiddleware)
+
+# Compress JSON responses larger than 1 KB for clients that send Accept-Encoding: gzip.
+# Added after ETagMiddleware so it wraps it: ETags are computed on the uncompressed body.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+
+class FastCORSMiddleware:
+    """
+    CORS middleware with all response headers precomputed at startup.
+
+    Equivalent to Starlette's CORSMiddleware configured with allow_credentials=True
+    and all methods/headers allowed, but origin matching is a frozenset lookup and
+    no header lists are joined or formatted per request. Because credentials are
+    allowed, the request origin is echoed back rather than "*".
+    """
+
+    ALLOW_METHODS = b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"
+    MAX_AGE = b"600"
+
+    def __init__(self, app, allow_origins):
+        self.app = app
+        self.allow_all_origins = "*" in allow_origins
+        self.allow_origins = frozenset(origin.encode("latin-1") for origin in allow_origins)
+        self.preflight_headers = [
+            (b"access-control-allow-methods", self.ALLOW_METHODS),
+            (b"access-control-allow-credentials", b"true"),
+            (b"access-control-max-age", self.MAX_AGE),
+            (b"vary", b"Origin"),
+            (b"content-length", b"0"),
+        ]
+        self.simple_headers = [
+            (b"access-control-allow-credentials", b"true"),
+            (b"vary", b"Origin"),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin = None
+        request_method = None
+        request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        allowed = self.allow_all_origins or origin in self.allow_origins
+
+        # Preflight request: answer directly without touching the app
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            if not allowed:
+                await send({"type": "http.response.start", "status": 400, "headers": [(b"content-length", b"0")]})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            headers = [(b"access-control-allow-origin", origin), *self.preflight_headers]
+            if request_headers:
+                headers.append((b"access-control-allow-headers", request_headers))
+            await send({"type": "http.response.start", "status": 204, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if not allowed:
+            await self.app(scope, receive, send)
+            return
+
+        cors_headers = [(b"access-control-allow-origin", origin), *self.simple_headers]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *cors_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
 # Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=cors_origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+app.add_middleware(FastCORSMiddleware, allow_origins=cors_origins)
 
 
-# Request logging middleware (debug-level, minimal noise by default)
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """Lightweight request logging; detailed logs only when LOG_LEVEL=DEBUG."""
-    start_time = time.time()
+class RequestLoggingMiddleware:
+    """
+    Lightweight request logging; detailed logs only when LOG_LEVEL=DEBUG.
 
-    method = request.method
-    path = request.url.path
-    query_params = str(request.query_params) if request.query_params else None
+    Implemented as a pure ASGI middleware rather than via @app.middleware("http"),
+    which wraps every request in BaseHTTPMiddleware and adds per-request overhead.
+    """
 
-    # Debug-level request log (no body to avoid noisy/large logs)
-    logger.debug(
-        "INCOMING REQUEST: %s %s%s",
-        method,
-        path,
-        f"?{query_params}" if query_params else "",
-    )
+    def __init__(self, app):
+        self.app = app
 
-    # Process request
-    try:
-        response = await call_next(request)
-    except Exception as e:
-        logger.error("EXCEPTION in request handler: %s %s | Error: %s", method, path, e, exc_info=True)
-        raise
-
-    # Debug-level response log
-    process_time = time.time() - start_time
-    logger.debug(
-        "RESPONSE: %s %s -> %s (took %.3fs)",
-        method,
-        path,
-        response.status_code,
-        process_time,
-    )
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        debug = logger.isEnabledFor(logging.DEBUG)
+        method = scope["method"]
+        # ASGI servers provide the decoded path as a str, so nothing is parsed or decoded here
+        path = scope["path"]
+
+        # Debug-level request log (no body to avoid noisy/large logs)
+        if debug:
+            query_string = scope.get("query_string")
+            logger.debug(
+                "INCOMING REQUEST: %s %s%s",
+                method,
+                path,
+                f"?{query_string.decode('latin-1')}" if query_string else "",
+            )
+
+        start_time = time.perf_counter()
+        status_code = None
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
 
-    return response
+        # Process request
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            logger.error(
+                "EXCEPTION in request handler: %s %s | Error: %s",
+                method, path, e, exc_info=True
+            )
+            raise
+
+        # Debug-level response log
+        if debug:
+            process_time = time.perf_counter() - start_time
+            logger.debug(
+                "RESPONSE: %s %s -> %s (took %.3fs)",
+                method,
+                path,
+                status_code,
+                process_time,
+            )
+
+
+app.add_middleware(RequestLoggingMiddleware)
 
 # Include routers
-app.include_router(categories.router)
-app.include_router(groups.router)
-app.include_router(products.router)
-app.include_router(product_extended_data.router)
-app.include_router(prices_current.router)
-app.include_router(prices_history.router)
-app.include_router(category_extended_data_keys.router)
-app.include_router(favorites.router)
-app.include_router(user_inventory.router)
-app.include_router(deck_lists.router)
-app.include_router(profiles.router)
-app.include_router(vendor_prices.router)
-app.include_router(feedback.router)
+API_ROUTERS = [
+    categories.router,
+    groups.router,
+    products.router,
+    product_extended_data.router,
+    prices_current.router,
+    prices_history.router,
+    category_extended_data_keys.router,
+    favorites.router,
+    user_inventory.router,
+    deck_lists.router,
+    profiles.router,
+    vendor_prices.router,
+    feedback.router,
+]
+for api_router in API_ROUTERS:
+    app.include_router(api_router)
 
 # Serve static files (HTML documentation)
 app.mount("/static", StaticFiles(directory="src/static"), name="static")
 
 
 @app.get("/")
-async def root():
-    """Serve the frontend documentation page."""
-    return FileResponse("src/static/index.html")
+async def root(request: Request):
+    """Serve the frontend documentation page (cached in memory, revalidated via ETag)."""
+    headers = {"ETag": app.state.index_etag, "Cache-Control": "public, max-age=3600"}
+    if request.headers.get("if-none-match") == app.state.index_etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(app.state.index_html, media_type="text/html", headers=headers)
 
 
 @app.get("/api")
@@ -160,24 +375,33 @@ async def health():
     return {"status": "healthy"}
 
 
+# Top-level route prefixes, computed once after all routes are registered (used in 404 logs)
+ROUTE_PREFIXES = frozenset(
+    [api_router.prefix for api_router in API_ROUTERS]
+    + ["/" + route.path.split("/")[1] for route in app.routes if getattr(route, "path", None)]
+)
+AVAILABLE_ROUTES = ", ".join(sorted(ROUTE_PREFIXES))
+
+
 # Exception handlers for better logging
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     """Handle HTTP exceptions with detailed logging."""
+    # Lazy %-formatting so nothing is built when the log level filters the message out;
+    # the path is read from the ASGI scope to avoid constructing a URL object
     logger.warning(
-        f"HTTP {exc.status_code} ERROR: {request.method} {request.url.path} | "
-        f"Detail: {exc.detail}"
+        "HTTP %s ERROR: %s %s | Detail: %s",
+        exc.status_code, request.method, request.scope["path"], exc.detail
     )
     
     # Special logging for 404s to help debug routing issues
-    if exc.status_code == 404:
+    if exc.status_code == 404 and logger.isEnabledFor(logging.ERROR):
         logger.error(
-            f"404 NOT FOUND: Client tried to access '{request.method} {request.url.path}' "
-            f"| Query params: {request.query_params} | "
-            f"Available routes: /prices-current/bulk, /prices-history/*"
+            "404 NOT FOUND: Client tried to access '%s %s' | Query params: %s | Available routes: %s",
+            request.method, request.scope["path"], request.query_params, AVAILABLE_ROUTES
         )
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail}
     )
@@ -195,11 +419,10 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         pass
     
     logger.error(
-        f"VALIDATION ERROR: {request.method} {request.url.path} | "
-        f"Errors: {exc.errors()} | "
-        f"Body preview: {body_preview}"
+        "VALIDATION ERROR: %s %s | Errors: %s | Body preview: %s",
+        request.method, request.scope["path"], exc.errors(), body_preview
     )
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={"detail": exc.errors()}
     )
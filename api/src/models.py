@@ -1,7 +1,10 @@
 """
 Pydantic models for requests and responses.
 """
-from typing import Generic, TypeVar, List, Optional
+import base64
+import binascii
+import json
+from typing import Any, Dict, Generic, TypeVar, List, Optional
 from pydantic import BaseModel, Field
 
 T = TypeVar('T')
@@ -20,4 +23,36 @@ class PaginatedResponse(BaseModel, Generic[T]):
     limit: int
     total: Optional[int] = None
     has_more: bool = False
+    next_cursor: Optional[str] = None
 
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """Encode the sort-key values of the last row of a page as an opaque keyset pagination cursor."""
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decode a cursor produced by encode_cursor. Raises ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(position, dict):
+        raise ValueError("Invalid cursor")
+    return position
+
+
+def quote_filter_value(value: str) -> str:
+    """Double-quote a value for use inside a PostgREST filter expression (handles commas, dots, parentheses)."""
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def normalize_item_quantities(items: dict) -> Dict[str, int]:
+    """
+    Normalize a product_id -> quantity map: string keys, integer values, positive quantities only.
+    Non-numeric values are dropped (v >= 1 keeps exactly the values where int(v) > 0).
+    """
+    return {str(k): int(v) for k, v in items.items() if isinstance(v, (int, float)) and v >= 1}
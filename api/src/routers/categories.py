@@ -2,16 +2,21 @@
 Categories endpoint router.
 """
 from typing import Optional
+from cachetools import TTLCache
 from fastapi import APIRouter, HTTPException, Depends, Query
 from supabase import Client
-from src.database import get_db_client
+from src.database import get_db_client, run_query
 from src.models import PaginationParams, PaginatedResponse
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
+# Categories change rarely, so list pages and single lookups are cached per worker for a short time
+CATEGORY_CACHE_TTL_SECONDS = 60
+_category_cache = TTLCache(maxsize=256, ttl=CATEGORY_CACHE_TTL_SECONDS)
 
-@router.get("", response_model=PaginatedResponse[dict])
-@router.get("/", response_model=PaginatedResponse[dict])
+
+@router.get("", responses={200: {"model": PaginatedResponse[dict]}})
+@router.get("/", responses={200: {"model": PaginatedResponse[dict]}})
 async def list_categories(
     pagination: PaginationParams = Depends(),
     db: Client = Depends(get_db_client)
@@ -20,33 +25,33 @@ async def list_categories(
     List all categories with pagination.
     Results are sorted by category_id.
     """
+    cache_key = ("list", pagination.page, pagination.limit)
+    cached = _category_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
         offset = (pagination.page - 1) * pagination.limit
         
-        response = (
+        response = await run_query(
             db.table("categories")
-            .select("*")
+            .select("*", count="exact")
             .order("category_id", desc=False)
             .range(offset, offset + pagination.limit - 1)
-            .execute()
         )
-        
-        count_response = (
-            db.table("categories")
-            .select("*", count="exact")
-            .execute()
-        )
-        total = count_response.count if count_response.count is not None else None
+        total = response.count if response.count is not None else None
         
         has_more = total is not None and (offset + pagination.limit) < total
         
-        return PaginatedResponse(
-            data=response.data,
-            page=pagination.page,
-            limit=pagination.limit,
-            total=total,
-            has_more=has_more
-        )
+        result = {
+            "data": response.data,
+            "page": pagination.page,
+            "limit": pagination.limit,
+            "total": total,
+            "has_more": has_more
+        }
+        _category_cache[cache_key] = result
+        return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching categories: {str(e)}")
 
@@ -58,24 +63,12 @@ async def get_product_counts_by_category(
     """
     Get product counts by category.
     Returns a dictionary mapping category_id to product count.
+    Counts are computed in a single grouped query by the product_counts_by_category() database function.
     """
     try:
-        # Get all categories
-        categories_response = db.table("categories").select("category_id").execute()
-        category_ids = [cat["category_id"] for cat in categories_response.data] if categories_response.data else []
-        
-        # Get product counts for each category
-        counts = {}
-        for category_id in category_ids:
-            count_response = (
-                db.table("products")
-                .select("*", count="exact")
-                .eq("category_id", category_id)
-                .execute()
-            )
-            counts[category_id] = count_response.count if count_response.count is not None else 0
+        response = await run_query(db.rpc("product_counts_by_category"))
         
-        return counts
+        return {row["category_id"]: row["cnt"] for row in response.data} if response.data else {}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching product counts by category: {str(e)}")
 
@@ -97,7 +90,7 @@ async def get_category_rules(
         if category_id is not None:
             query = query.eq("category_id", category_id)
         
-        response = query.execute()
+        response = await run_query(query)
         
         # If filtering by category_id and not found, return 404
         if category_id is not None:
@@ -125,17 +118,22 @@ async def get_category(
     """
     Get a single category by primary key (category_id).
     """
+    cache_key = ("get", category_id)
+    cached = _category_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        response = (
+        response = await run_query(
             db.table("categories")
             .select("*")
             .eq("category_id", category_id)
-            .execute()
         )
         
         if not response.data:
             raise HTTPException(status_code=404, detail=f"Category with id {category_id} not found")
         
+        _category_cache[cache_key] = response.data[0]
         return response.data[0]
     except HTTPException:
         raise
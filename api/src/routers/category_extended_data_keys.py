@@ -1,16 +1,34 @@
 """
 Category Extended Data Keys endpoint router.
 """
-from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Dict, List
+from cachetools import TTLCache
+from fastapi import APIRouter, HTTPException, Depends, Query, Body
+from pydantic import BaseModel, Field
 from supabase import Client
-from src.database import get_db_client
-from src.models import PaginationParams, PaginatedResponse
+from src.database import get_db_client, run_query
+from src.models import PaginationParams, PaginatedResponse, quote_filter_value
 
 router = APIRouter(prefix="/category-extended-data-keys", tags=["category-extended-data-keys"])
 
+# Extended data key metadata changes rarely, so list pages and single lookups are cached per worker for a short time
+KEYS_CACHE_TTL_SECONDS = 60
+_keys_cache = TTLCache(maxsize=256, ttl=KEYS_CACHE_TTL_SECONDS)
 
-@router.get("", response_model=PaginatedResponse[dict])
-@router.get("/", response_model=PaginatedResponse[dict])
+
+class CategoryExtendedDataKeyRef(BaseModel):
+    """Composite primary key of a category extended data key."""
+    category_id: int
+    key: str
+
+
+class BulkCategoryExtendedDataKeyRequest(BaseModel):
+    """Model for bulk category extended data key lookup request."""
+    keys: List[CategoryExtendedDataKeyRef] = Field(..., min_length=1, max_length=200, description="List of (category_id, key) pairs to fetch")
+
+
+@router.get("", responses={200: {"model": PaginatedResponse[dict]}})
+@router.get("/", responses={200: {"model": PaginatedResponse[dict]}})
 async def list_category_extended_data_keys(
     pagination: PaginationParams = Depends(),
     db: Client = Depends(get_db_client)
@@ -19,39 +37,39 @@ async def list_category_extended_data_keys(
     List all category extended data keys with pagination.
     Results are sorted by category_id, then key (composite primary key).
     """
+    cache_key = ("list", pagination.page, pagination.limit)
+    cached = _keys_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
         offset = (pagination.page - 1) * pagination.limit
         
-        response = (
+        response = await run_query(
             db.table("category_extended_data_keys")
-            .select("*")
+            .select("*", count="exact")
             .order("category_id", desc=False)
             .order("key", desc=False)
             .range(offset, offset + pagination.limit - 1)
-            .execute()
         )
-        
-        count_response = (
-            db.table("category_extended_data_keys")
-            .select("*", count="exact")
-            .execute()
-        )
-        total = count_response.count if count_response.count is not None else None
+        total = response.count if response.count is not None else None
         
         has_more = total is not None and (offset + pagination.limit) < total
         
-        return PaginatedResponse(
-            data=response.data,
-            page=pagination.page,
-            limit=pagination.limit,
-            total=total,
-            has_more=has_more
-        )
+        result = {
+            "data": response.data,
+            "page": pagination.page,
+            "limit": pagination.limit,
+            "total": total,
+            "has_more": has_more
+        }
+        _keys_cache[cache_key] = result
+        return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching category extended data keys: {str(e)}")
 
 
-@router.get("/by-category/{category_id}", response_model=PaginatedResponse[dict])
+@router.get("/by-category/{category_id}", responses={200: {"model": PaginatedResponse[dict]}})
 async def get_keys_by_category(
     category_id: int,
     pagination: PaginationParams = Depends(),
@@ -61,35 +79,34 @@ async def get_keys_by_category(
     Get all extended data keys for a specific category (filtered by foreign key category_id).
     Results are sorted by key and support pagination.
     """
+    cache_key = ("by-category", category_id, pagination.page, pagination.limit)
+    cached = _keys_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
         offset = (pagination.page - 1) * pagination.limit
         
-        response = (
+        response = await run_query(
             db.table("category_extended_data_keys")
-            .select("*")
+            .select("*", count="exact")
             .eq("category_id", category_id)
             .order("key", desc=False)
             .range(offset, offset + pagination.limit - 1)
-            .execute()
-        )
-        
-        count_response = (
-            db.table("category_extended_data_keys")
-            .select("*", count="exact")
-            .eq("category_id", category_id)
-            .execute()
         )
-        total = count_response.count if count_response.count is not None else None
+        total = response.count if response.count is not None else None
         
         has_more = total is not None and (offset + pagination.limit) < total
         
-        return PaginatedResponse(
-            data=response.data,
-            page=pagination.page,
-            limit=pagination.limit,
-            total=total,
-            has_more=has_more
-        )
+        result = {
+            "data": response.data,
+            "page": pagination.page,
+            "limit": pagination.limit,
+            "total": total,
+            "has_more": has_more
+        }
+        _keys_cache[cache_key] = result
+        return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching keys by category: {str(e)}")
 
@@ -103,13 +120,17 @@ async def get_category_extended_data_key(
     """
     Get a single category extended data key by composite primary key (category_id, key).
     """
+    cache_key = ("get", category_id, key)
+    cached = _keys_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        response = (
+        response = await run_query(
             db.table("category_extended_data_keys")
             .select("*")
             .eq("category_id", category_id)
             .eq("key", key)
-            .execute()
         )
         
         if not response.data:
@@ -118,9 +139,57 @@ async def get_category_extended_data_key(
                 detail=f"Category extended data key with category_id {category_id} and key '{key}' not found"
             )
         
+        _keys_cache[cache_key] = response.data[0]
         return response.data[0]
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching category extended data key: {str(e)}")
 
+
+@router.post("/lookup")
+async def get_category_extended_data_keys_bulk(
+    request: BulkCategoryExtendedDataKeyRequest = Body(...),
+    db: Client = Depends(get_db_client)
+):
+    """
+    Get multiple category extended data keys by composite primary key (category_id, key) in bulk.
+    All pairs are fetched in a single query. Pairs that don't exist are not included in the response.
+    
+    **Limits:**
+    - Maximum 200 pairs per request
+    
+    **Example:**
+    ```json
+    {
+      "keys": [{"category_id": 1, "key": "Rarity"}, {"category_id": 1, "key": "Color"}]
+    }
+    ```
+    """
+    try:
+        # Group keys by category so each category becomes one and(category_id.eq.X,key.in.(...)) clause
+        keys_by_category: Dict[int, List[str]] = {}
+        for ref in request.keys:
+            keys_by_category.setdefault(ref.category_id, []).append(quote_filter_value(ref.key))
+        
+        or_filter = ",".join(
+            f"and(category_id.eq.{category_id},key.in.({','.join(keys)}))"
+            for category_id, keys in keys_by_category.items()
+        )
+        
+        response = await run_query(
+            db.table("category_extended_data_keys")
+            .select("*")
+            .or_(or_filter)
+            .order("category_id", desc=False)
+            .order("key", desc=False)
+        )
+        
+        data = response.data if response.data else []
+        return {
+            "data": data,
+            "requested_count": len(request.keys),
+            "found_count": len(data)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching category extended data keys: {str(e)}")
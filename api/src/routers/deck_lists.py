@@ -1,23 +1,61 @@
 """
 Deck Lists endpoint router.
 """
+from datetime import datetime
 from typing import Optional, List, Dict
 from uuid import UUID
-from fastapi import APIRouter, HTTPException, Depends, Body, Header, Query
+from cachetools import TTLCache
+from fastapi import APIRouter, HTTPException, Depends, Body, Header, Query, Response, status
 from pydantic import BaseModel, Field
 from supabase import Client
-from src.database import get_db_client
-from src.models import PaginationParams, PaginatedResponse
+from src.database import get_db_client, run_query
+from src.models import PaginationParams, PaginatedResponse, encode_cursor, decode_cursor
 from src.auth import require_auth
 
 router = APIRouter(prefix="/deck-lists", tags=["deck-lists"])
 
+# Public list pages are cached per worker for a short time. Single deck lists are
+# not cached so an owner always reads back their own writes.
+# Writes evict only the affected pages from this worker's cache; other workers may
+# serve stale list pages until the TTL expires.
+DECK_LIST_CACHE_TTL_SECONDS = 15
+_deck_list_cache = TTLCache(maxsize=1024, ttl=DECK_LIST_CACHE_TTL_SECONDS)
+
+
+def _invalidate_deck_list_cache(user_id: UUID, category_id: Optional[int] = None):
+    """
+    Evict the cached list pages a write to one of user_id's deck lists can change:
+    unfiltered pages, pages filtered by that user and pages filtered by the category.
+    When category_id is unknown, pages for every category are evicted.
+    """
+    for key in list(_deck_list_cache.keys()):
+        _, _, _, key_user_id, key_category_id, _, _ = key
+        if key_user_id is not None and key_user_id != user_id:
+            continue
+        if category_id is not None and key_category_id is not None and key_category_id != category_id:
+            continue
+        _deck_list_cache.pop(key, None)
+
+# Usernames change rarely, so creator lookups for write responses are cached per worker
+USERNAME_CACHE_TTL_SECONDS = 60
+_username_cache = TTLCache(maxsize=10000, ttl=USERNAME_CACHE_TTL_SECONDS)
+_MISSING = object()
+
+# Upper bound on distinct products sent in one request, which bounds the work done per write
+MAX_DECK_LIST_ITEMS = 1000
+
+# Every deck list column except the items JSONB, which dominates row size
+DECK_LIST_SUMMARY_COLUMNS = (
+    "deck_list_id,user_id,username,category_id,name,card_count,meta,"
+    "color_1,color_2,strategy,selling,buying,private,created_at,updated_at"
+)
+
 
 class DeckListCreate(BaseModel):
     """Model for creating a deck list."""
     category_id: int
     name: str
-    items: Dict[str, int] = Field(default_factory=dict, description="Dictionary of product_id -> quantity")
+    items: Dict[str, int] = Field(default_factory=dict, max_length=MAX_DECK_LIST_ITEMS, description="Dictionary of product_id -> quantity")
     meta: Optional[str] = Field(None, description="Generic metadata field. Can be used for encoded color/quantity information in format '{color_1}{quantity_1}-{color_2}{quantity_2}'. Example: 'R3-G2-B1'")
     color_1: Optional[str] = Field(None, description="Primary color of the deck")
     color_2: Optional[str] = Field(None, description="Secondary color of the deck")
@@ -41,7 +79,7 @@ class DeckListUpdate(BaseModel):
 
 class DeckListItemsUpdate(BaseModel):
     """Model for updating deck list items and cache fields."""
-    items: Dict[str, int] = Field(..., description="Dictionary of product_id -> quantity")
+    items: Dict[str, int] = Field(..., max_length=MAX_DECK_LIST_ITEMS, description="Dictionary of product_id -> quantity")
     color_1: Optional[str] = Field(None, description="Primary color of the deck")
     color_2: Optional[str] = Field(None, description="Secondary color of the deck")
     strategy: Optional[str] = Field(None, description="Strategy description for the deck")
@@ -52,20 +90,51 @@ class DeckListItemsUpdate(BaseModel):
 
 class DeckListItemsDelete(BaseModel):
     """Model for deleting deck list items."""
-    product_ids: List[int] = Field(..., min_items=1, description="List of product IDs to remove")
+    product_ids: List[int] = Field(..., min_length=1, description="List of product IDs to remove")
+
+
+async def _attach_username(db: Client, deck_list: dict) -> None:
+    """Set deck_list["username"] to the creator's username, or None if it cannot be found."""
+    user_id = deck_list.get("user_id")
+    if not user_id:
+        deck_list["username"] = None
+        return
+    
+    username = _username_cache.get(user_id, _MISSING)
+    if username is _MISSING:
+        try:
+            profile_response = await run_query(
+                db.table("profiles")
+                .select("username")
+                .eq("id", user_id)
+            )
+        except Exception:
+            # If username lookup fails, continue without username (and don't cache the miss)
+            deck_list["username"] = None
+            return
+        username = profile_response.data[0].get("username") if profile_response.data else None
+        _username_cache[user_id] = username
+    
+    deck_list["username"] = username
 
 
-def calculate_card_count(items: Dict[str, int]) -> int:
-    """Calculate total card count from items dictionary."""
-    return sum(items.values()) if items else 0
+def _count_mode(user_id: Optional[UUID], category_id: Optional[int]) -> str:
+    """
+    PostgREST count mode for list_deck_lists.
+    Filtered lists are bounded by an index lookup, so an exact count is cheap. The unfiltered
+    list would count the whole table on every call, so it uses the planner's estimate instead.
+    """
+    return "exact" if (user_id is not None or category_id is not None) else "planned"
 
 
-@router.get("", response_model=PaginatedResponse[dict])
-@router.get("/", response_model=PaginatedResponse[dict])
+@router.get("", responses={200: {"model": PaginatedResponse[dict]}})
+@router.get("/", responses={200: {"model": PaginatedResponse[dict]}})
 async def list_deck_lists(
     pagination: PaginationParams = Depends(),
-    user_id: Optional[str] = Query(None, description="Filter by user_id (UUID)"),
+    user_id: Optional[UUID] = Query(None, description="Filter by user_id (UUID)"),
     category_id: Optional[int] = Query(None, description="Filter by category_id"),
+    include_items: bool = Query(True, description="Include the items map of each deck list. Set to false for a lighter response when items are not needed."),
+    cursor: Optional[str] = Query(None, description="Keyset pagination cursor (next_cursor from the previous page). When provided, page is ignored and total is not computed."),
     authorization: Optional[str] = Header(None),
     db: Client = Depends(get_db_client)
 ):
@@ -73,89 +142,97 @@ async def list_deck_lists(
     List deck lists with optional filtering.
     - Public read access: Anyone can view all deck lists
     - Optional filters: user_id and/or category_id
-    - Results are sorted by updated_at (descending).
+    - include_items=false omits the items map from each deck list
+    - Results are sorted by updated_at (descending), then deck_list_id (descending).
+    - Pass next_cursor back as cursor to fetch the following page without an OFFSET scan.
     """
+    cache_key = ("list", pagination.page, pagination.limit, user_id, category_id, include_items, cursor)
+    cached = _deck_list_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
         offset = (pagination.page - 1) * pagination.limit
         
-        query = db.table("deck_lists").select("*")
+        columns = "*" if include_items else DECK_LIST_SUMMARY_COLUMNS
+        
+        # The view joins in the creator's username. Offset pages return a total alongside the
+        # rows (see _count_mode); keyset pages skip the count entirely.
+        if cursor is None:
+            query = db.table("deck_lists_with_username").select(columns, count=_count_mode(user_id, category_id))
+        else:
+            query = db.table("deck_lists_with_username").select(columns)
         
         # Apply optional filters
-        if user_id:
-            try:
-                # Validate UUID format
-                UUID(user_id)
-                query = query.eq("user_id", user_id)
-            except ValueError:
-                raise HTTPException(status_code=400, detail=f"Invalid user_id format: {user_id}")
+        if user_id is not None:
+            query = query.eq("user_id", str(user_id))
         
         if category_id is not None:
             query = query.eq("category_id", category_id)
         
-        response = (
-            query
-            .order("updated_at", desc=True)
-            .range(offset, offset + pagination.limit - 1)
-            .execute()
-        )
-        
-        # Get usernames for all user_ids in the results
-        deck_lists = response.data if response.data else []
-        user_ids = list(set(dl.get("user_id") for dl in deck_lists if dl.get("user_id")))
+        query = query.order("updated_at", desc=True).order("deck_list_id", desc=True)
         
-        username_map = {}
-        if user_ids:
+        if cursor is None:
+            # Fetch one extra row so has_more stays exact even when total is only an estimate
+            response = await run_query(
+                query.range(offset, offset + pagination.limit)
+            )
+            deck_lists = response.data if response.data else []
+            has_more = len(deck_lists) > pagination.limit
+            deck_lists = deck_lists[:pagination.limit]
+            total = response.count
+        else:
             try:
-                profiles_response = (
-                    db.table("profiles")
-                    .select("id,username")
-                    .in_("id", user_ids)
-                    .execute()
+                position = decode_cursor(cursor)
+                cursor_updated_at = datetime.fromisoformat(position["updated_at"]).isoformat()
+                cursor_deck_list_id = int(position["deck_list_id"])
+            except (ValueError, KeyError, TypeError):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            
+            # Rows strictly after the cursor in (updated_at, deck_list_id) order; the extra
+            # row only tells whether another page follows
+            response = await run_query(
+                query
+                .or_(
+                    f'updated_at.lt."{cursor_updated_at}",'
+                    f'and(updated_at.eq."{cursor_updated_at}",deck_list_id.lt.{cursor_deck_list_id})'
                 )
-                if profiles_response.data:
-                    username_map = {p["id"]: p.get("username") for p in profiles_response.data}
-            except Exception as e:
-                # If username lookup fails, continue without usernames
-                pass
-        
-        # Add username to each deck list
-        for deck_list in deck_lists:
-            user_id = deck_list.get("user_id")
-            deck_list["username"] = username_map.get(user_id) if user_id else None
-        
-        # Get count with same filters
-        count_query = db.table("deck_lists").select("*", count="exact")
-        if user_id:
-            try:
-                UUID(user_id)
-                count_query = count_query.eq("user_id", user_id)
-            except ValueError:
-                pass  # Already validated above
-        if category_id is not None:
-            count_query = count_query.eq("category_id", category_id)
-        
-        count_response = count_query.execute()
-        total = count_response.count if count_response.count is not None else None
-        
-        has_more = total is not None and (offset + pagination.limit) < total
+                .limit(pagination.limit + 1)
+            )
+            deck_lists = response.data if response.data else []
+            has_more = len(deck_lists) > pagination.limit
+            deck_lists = deck_lists[:pagination.limit]
+            total = None
+        
+        next_cursor = None
+        if has_more and deck_lists:
+            last = deck_lists[-1]
+            next_cursor = encode_cursor({
+                "updated_at": last["updated_at"],
+                "deck_list_id": last["deck_list_id"]
+            })
         
-        return PaginatedResponse(
-            data=deck_lists,
-            page=pagination.page,
-            limit=pagination.limit,
-            total=total,
-            has_more=has_more
-        )
+        result = {
+            "data": deck_lists,
+            "page": pagination.page,
+            "limit": pagination.limit,
+            "total": total,
+            "has_more": has_more,
+            "next_cursor": next_cursor
+        }
+        _deck_list_cache[cache_key] = result
+        return result
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching deck lists: {str(e)}")
 
 
-@router.get("/search", response_model=PaginatedResponse[dict])
+@router.get("/search", responses={200: {"model": PaginatedResponse[dict]}})
 async def search_deck_lists(
     q: str = Query(..., min_length=1, description="Search query for partial deck name matching (case-insensitive)"),
     pagination: PaginationParams = Depends(),
+    include_items: bool = Query(True, description="Include the items map of each deck list. Set to false for a lighter response when items are not needed."),
     db: Client = Depends(get_db_client)
 ):
     """
@@ -167,64 +244,35 @@ async def search_deck_lists(
     **Example:**
     - Searching for "fire" will match "Fire Deck", "Inferno Fire", etc.
     - Searching for "meta" will match "Meta Deck", "Meta Build", etc.
+    
+    include_items=false omits the items map from each deck list.
     """
     try:
         offset = (pagination.page - 1) * pagination.limit
         
         # Query with case-insensitive partial name matching using ilike
-        response = (
-            db.table("deck_lists")
-            .select("*")
+        response = await run_query(
+            db.table("deck_lists_with_username")
+            .select("*" if include_items else DECK_LIST_SUMMARY_COLUMNS, count="exact")
             .ilike("name", f"%{q}%")
             .order("name", desc=False)
             .order("updated_at", desc=True)
             .range(offset, offset + pagination.limit - 1)
-            .execute()
         )
         
-        # Get usernames for all user_ids in the results
         deck_lists = response.data if response.data else []
-        user_ids = list(set(dl.get("user_id") for dl in deck_lists if dl.get("user_id")))
         
-        username_map = {}
-        if user_ids:
-            try:
-                profiles_response = (
-                    db.table("profiles")
-                    .select("id,username")
-                    .in_("id", user_ids)
-                    .execute()
-                )
-                if profiles_response.data:
-                    username_map = {p["id"]: p.get("username") for p in profiles_response.data}
-            except Exception:
-                # If username lookup fails, continue without usernames
-                pass
-        
-        # Add username to each deck list
-        for deck_list in deck_lists:
-            user_id = deck_list.get("user_id")
-            deck_list["username"] = username_map.get(user_id) if user_id else None
-        
-        # Get total count
-        count_query = (
-            db.table("deck_lists")
-            .select("*", count="exact")
-            .ilike("name", f"%{q}%")
-        )
-        
-        count_response = count_query.execute()
-        total = count_response.count if count_response.count is not None else None
+        total = response.count
         
         has_more = total is not None and (offset + pagination.limit) < total
         
-        return PaginatedResponse(
-            data=deck_lists,
-            page=pagination.page,
-            limit=pagination.limit,
-            total=total,
-            has_more=has_more
-        )
+        return {
+            "data": deck_lists,
+            "page": pagination.page,
+            "limit": pagination.limit,
+            "total": total,
+            "has_more": has_more
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching deck lists: {str(e)}")
 
@@ -241,15 +289,12 @@ async def create_deck_list(
     """
     try:
         
-        card_count = calculate_card_count(deck_list.items)
-        
-        # Build insert payload
+        # Build insert payload (card_count is generated by the database from items)
         insert_payload = {
             "user_id": str(user_id),
             "category_id": deck_list.category_id,
             "name": deck_list.name,
-            "items": deck_list.items,
-            "card_count": card_count
+            "items": deck_list.items
         }
         
         # Add optional fields if provided
@@ -268,32 +313,18 @@ async def create_deck_list(
         if deck_list.private is not None:
             insert_payload["private"] = deck_list.private
         
-        response = (
+        response = await run_query(
             db.table("deck_lists")
             .insert(insert_payload)
-            .execute()
         )
         
         if not response.data:
             raise HTTPException(status_code=500, detail="Failed to create deck list")
         
         deck_list = response.data[0]
+        _invalidate_deck_list_cache(user_id, deck_list.get("category_id"))
         
-        # Get username for the deck list creator
-        try:
-            profile_response = (
-                db.table("profiles")
-                .select("username")
-                .eq("id", str(user_id))
-                .execute()
-            )
-            if profile_response.data and len(profile_response.data) > 0:
-                deck_list["username"] = profile_response.data[0].get("username")
-            else:
-                deck_list["username"] = None
-        except Exception:
-            # If username lookup fails, continue without username
-            deck_list["username"] = None
+        await _attach_username(db, deck_list)
         
         return deck_list
     except HTTPException:
@@ -312,12 +343,11 @@ async def get_deck_list(
     Public read access - no authentication required.
     """
     try:
-        # First, try to get the deck list directly
-        response = (
-            db.table("deck_lists")
+        # The view joins in the creator's username
+        response = await run_query(
+            db.table("deck_lists_with_username")
             .select("*")
             .eq("deck_list_id", deck_list_id)
-            .execute()
         )
         
         # Check response
@@ -345,28 +375,7 @@ async def get_deck_list(
                 detail=f"Deck list with id {deck_list_id} not found"
             )
         
-        deck_list = response.data[0]
-        
-        # Get username for the deck list creator
-        user_id = deck_list.get("user_id")
-        username = None
-        if user_id:
-            try:
-                profile_response = (
-                    db.table("profiles")
-                    .select("username")
-                    .eq("id", user_id)
-                    .execute()
-                )
-                if profile_response.data and len(profile_response.data) > 0:
-                    username = profile_response.data[0].get("username")
-            except Exception:
-                # If username lookup fails, continue without username
-                pass
-        
-        deck_list["username"] = username
-        
-        return deck_list
+        return response.data[0]
     except HTTPException:
         raise
     except Exception as e:
@@ -390,18 +399,6 @@ async def update_deck_list(
     Note: To update items, use POST /deck-lists/{deck_list_id}/items endpoint.
     """
     try:
-        # Verify ownership
-        existing = (
-            db.table("deck_lists")
-            .select("*")
-            .eq("deck_list_id", deck_list_id)
-            .eq("user_id", str(user_id))
-            .execute()
-        )
-        
-        if not existing.data:
-            raise HTTPException(status_code=404, detail="Deck list not found")
-        
         # Build update payload with only provided fields
         update_payload = {}
         if deck_list.name is not None:
@@ -421,61 +418,25 @@ async def update_deck_list(
         if deck_list.private is not None:
             update_payload["private"] = deck_list.private
         
-        # If no fields to update, return existing
         if not update_payload:
-            deck_list_result = existing.data[0]
-            # Get username for the deck list creator
-            user_id_str = deck_list_result.get("user_id")
-            if user_id_str:
-                try:
-                    profile_response = (
-                        db.table("profiles")
-                        .select("username")
-                        .eq("id", user_id_str)
-                        .execute()
-                    )
-                    if profile_response.data and len(profile_response.data) > 0:
-                        deck_list_result["username"] = profile_response.data[0].get("username")
-                    else:
-                        deck_list_result["username"] = None
-                except Exception:
-                    deck_list_result["username"] = None
-            else:
-                deck_list_result["username"] = None
-            return deck_list_result
-        
-        response = (
+            raise HTTPException(status_code=400, detail="No fields provided to update")
+        
+        # The user_id filter doubles as the ownership check: no returned row means
+        # the deck list does not exist or belongs to someone else
+        response = await run_query(
             db.table("deck_lists")
             .update(update_payload)
             .eq("deck_list_id", deck_list_id)
             .eq("user_id", str(user_id))
-            .execute()
         )
         
         if not response.data:
-            raise HTTPException(status_code=500, detail="Failed to update deck list")
+            raise HTTPException(status_code=404, detail="Deck list not found")
         
         deck_list = response.data[0]
+        _invalidate_deck_list_cache(user_id, deck_list.get("category_id"))
         
-        # Get username for the deck list creator
-        user_id_str = deck_list.get("user_id")
-        if user_id_str:
-            try:
-                profile_response = (
-                    db.table("profiles")
-                    .select("username")
-                    .eq("id", user_id_str)
-                    .execute()
-                )
-                if profile_response.data and len(profile_response.data) > 0:
-                    deck_list["username"] = profile_response.data[0].get("username")
-                else:
-                    deck_list["username"] = None
-            except Exception:
-                # If username lookup fails, continue without username
-                deck_list["username"] = None
-        else:
-            deck_list["username"] = None
+        await _attach_username(db, deck_list)
         
         return deck_list
     except HTTPException:
@@ -484,7 +445,7 @@ async def update_deck_list(
         raise HTTPException(status_code=500, detail=f"Error updating deck list: {str(e)}")
 
 
-@router.delete("/{deck_list_id}")
+@router.delete("/{deck_list_id}", status_code=status.HTTP_204_NO_CONTENT, response_class=Response)
 async def delete_deck_list(
     deck_list_id: int,
     user_id: UUID = Depends(require_auth),
@@ -492,21 +453,23 @@ async def delete_deck_list(
 ):
     """
     Delete a deck list for the current user.
+    Returns 204 No Content on success.
     """
     try:
-        
-        response = (
+        # return=minimal skips sending the deleted row back; the exact count still
+        # reports whether a row owned by this user was deleted
+        response = await run_query(
             db.table("deck_lists")
-            .delete()
+            .delete(count="exact", returning="minimal")
             .eq("deck_list_id", deck_list_id)
             .eq("user_id", str(user_id))
-            .execute()
         )
         
-        if not response.data:
+        if not response.count:
             raise HTTPException(status_code=404, detail="Deck list not found")
         
-        return {"message": "Deck list deleted successfully"}
+        _invalidate_deck_list_cache(user_id)
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
     except HTTPException:
         raise
     except Exception as e:
@@ -527,121 +490,31 @@ async def update_deck_list_items(
     Also supports updating cache fields: color_1, color_2, strategy, selling, buying, private.
     """
     try:
-        # Get existing deck list
-        existing = (
-            db.table("deck_lists")
-            .select("*")
-            .eq("deck_list_id", deck_list_id)
-            .eq("user_id", str(user_id))
-            .execute()
+        # Normalization, merge (new items override existing) and the optional
+        # cache fields are applied in one owner-scoped UPDATE by the merge_deck_list_items()
+        # database function, so concurrent updates cannot overwrite each other's items.
+        # Cache fields left as None keep their current value.
+        response = await run_query(
+            db.rpc("merge_deck_list_items", {
+                "p_deck_list_id": deck_list_id,
+                "p_user_id": str(user_id),
+                "p_items": items_update.items,
+                "p_color_1": items_update.color_1,
+                "p_color_2": items_update.color_2,
+                "p_strategy": items_update.strategy,
+                "p_selling": items_update.selling,
+                "p_buying": items_update.buying,
+                "p_private": items_update.private
+            })
         )
         
-        if not existing.data or len(existing.data) == 0:
+        if not response.data:
             raise HTTPException(status_code=404, detail="Deck list not found")
         
-        # Get current items from database
-        current_items_raw = existing.data[0].get("items")
-        
-        # Handle current items - ensure it's a dict
-        if current_items_raw is None:
-            current_items = {}
-        elif isinstance(current_items_raw, dict):
-            current_items = current_items_raw
-        else:
-            # If it's not a dict, initialize as empty
-            current_items = {}
-        
-        # Normalize current items: ensure keys are strings and values are integers
-        normalized_current = {}
-        for k, v in current_items.items():
-            try:
-                key_str = str(k)
-                # Ensure value is an integer
-                if isinstance(v, (int, float)):
-                    val_int = int(v)
-                    if val_int > 0:  # Only keep positive quantities
-                        normalized_current[key_str] = val_int
-            except (ValueError, TypeError):
-                # Skip invalid entries
-                continue
-        
-        # Normalize new items: ensure keys are strings and values are integers
-        normalized_new = {}
-        for k, v in items_update.items.items():
-            try:
-                key_str = str(k)
-                # Ensure value is an integer
-                if isinstance(v, (int, float)):
-                    val_int = int(v)
-                    if val_int > 0:  # Only keep positive quantities
-                        normalized_new[key_str] = val_int
-            except (ValueError, TypeError):
-                # Skip invalid entries
-                continue
-        
-        # Merge (new items override existing)
-        merged_items = {**normalized_current, **normalized_new}
-        
-        # Calculate card count
-        card_count = sum(merged_items.values())
-        
-        # Build update payload with items and optional cache fields
-        update_payload = {
-            "items": merged_items,
-            "card_count": card_count
-        }
-        
-        # Add optional cache fields if provided
-        if items_update.color_1 is not None:
-            update_payload["color_1"] = items_update.color_1
-        if items_update.color_2 is not None:
-            update_payload["color_2"] = items_update.color_2
-        if items_update.strategy is not None:
-            update_payload["strategy"] = items_update.strategy
-        if items_update.selling is not None:
-            update_payload["selling"] = items_update.selling
-        if items_update.buying is not None:
-            update_payload["buying"] = items_update.buying
-        if items_update.private is not None:
-            update_payload["private"] = items_update.private
-        
-        # Update the deck list
-        # Note: Database trigger will also update card_count, but we calculate it here for consistency
-        response = (
-            db.table("deck_lists")
-            .update(update_payload)
-            .eq("deck_list_id", deck_list_id)
-            .eq("user_id", str(user_id))
-            .execute()
-        )
-        
-        if not response.data or len(response.data) == 0:
-            raise HTTPException(
-                status_code=500, 
-                detail="Failed to update deck list items. The update may have been rejected by the database."
-            )
-        
         deck_list = response.data[0]
+        _invalidate_deck_list_cache(user_id, deck_list.get("category_id"))
         
-        # Get username for the deck list creator
-        user_id_str = deck_list.get("user_id")
-        if user_id_str:
-            try:
-                profile_response = (
-                    db.table("profiles")
-                    .select("username")
-                    .eq("id", user_id_str)
-                    .execute()
-                )
-                if profile_response.data and len(profile_response.data) > 0:
-                    deck_list["username"] = profile_response.data[0].get("username")
-                else:
-                    deck_list["username"] = None
-            except Exception:
-                # If username lookup fails, continue without username
-                deck_list["username"] = None
-        else:
-            deck_list["username"] = None
+        await _attach_username(db, deck_list)
         
         return deck_list
     except HTTPException:
@@ -666,89 +539,23 @@ async def delete_deck_list_items(
     Delete items from a deck list for the current user.
     """
     try:
-        # Get existing deck list
-        existing = (
-            db.table("deck_lists")
-            .select("*")
-            .eq("deck_list_id", deck_list_id)
-            .eq("user_id", str(user_id))
-            .execute()
-        )
-        
-        if not existing.data or len(existing.data) == 0:
-            raise HTTPException(status_code=404, detail="Deck list not found")
-        
-        # Get current items from database
-        current_items_raw = existing.data[0].get("items")
-        
-        # Handle current items - ensure it's a dict
-        if current_items_raw is None:
-            current_items = {}
-        elif isinstance(current_items_raw, dict):
-            current_items = current_items_raw
-        else:
-            current_items = {}
-        
-        # Normalize current items: ensure keys are strings
-        normalized_current = {}
-        for k, v in current_items.items():
-            try:
-                key_str = str(k)
-                # Ensure value is an integer
-                if isinstance(v, (int, float)):
-                    val_int = int(v)
-                    if val_int > 0:
-                        normalized_current[key_str] = val_int
-            except (ValueError, TypeError):
-                continue
-        
-        # Convert product_ids to remove to strings
-        product_ids_to_remove = set(str(pid) for pid in items_delete.product_ids)
-        
-        # Remove requested items
-        updated_items = {k: v for k, v in normalized_current.items() if k not in product_ids_to_remove}
-        
-        # Calculate card count
-        card_count = sum(updated_items.values())
-        
-        response = (
-            db.table("deck_lists")
-            .update({
-                "items": updated_items,
-                "card_count": card_count
+        # Removal and re-normalization are applied in one UPDATE by the
+        # remove_deck_list_items() database function, scoped to the owner
+        response = await run_query(
+            db.rpc("remove_deck_list_items", {
+                "p_deck_list_id": deck_list_id,
+                "p_user_id": str(user_id),
+                "p_product_ids": [str(pid) for pid in items_delete.product_ids]
             })
-            .eq("deck_list_id", deck_list_id)
-            .eq("user_id", str(user_id))
-            .execute()
         )
         
-        if not response.data or len(response.data) == 0:
-            raise HTTPException(
-                status_code=500, 
-                detail="Failed to delete deck list items. The update may have been rejected by the database."
-            )
+        if not response.data:
+            raise HTTPException(status_code=404, detail="Deck list not found")
         
         deck_list = response.data[0]
+        _invalidate_deck_list_cache(user_id, deck_list.get("category_id"))
         
-        # Get username for the deck list creator
-        user_id_str = deck_list.get("user_id")
-        if user_id_str:
-            try:
-                profile_response = (
-                    db.table("profiles")
-                    .select("username")
-                    .eq("id", user_id_str)
-                    .execute()
-                )
-                if profile_response.data and len(profile_response.data) > 0:
-                    deck_list["username"] = profile_response.data[0].get("username")
-                else:
-                    deck_list["username"] = None
-            except Exception:
-                # If username lookup fails, continue without username
-                deck_list["username"] = None
-        else:
-            deck_list["username"] = None
+        await _attach_username(db, deck_list)
         
         return deck_list
     except HTTPException:
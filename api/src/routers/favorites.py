@@ -2,16 +2,27 @@
 Favorites endpoint router.
 Works with profiles table favorites column (JSONB structure).
 """
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Union
 from uuid import UUID
+from cachetools import TTLCache
 from fastapi import APIRouter, HTTPException, Depends, Body, Query
 from pydantic import BaseModel, Field
 from supabase import Client
-from src.database import get_db_client
+from src.database import get_db_client, run_query
 from src.auth import require_auth
 
 router = APIRouter(prefix="/favorites", tags=["favorites"])
 
+# Favorites are read on every product/deck page, so they are cached per worker for a short time.
+# Writes evict the user's entry in this worker; other workers may serve stale data until the TTL expires.
+FAVORITES_CACHE_TTL_SECONDS = 60
+_favorites_cache = TTLCache(maxsize=2048, ttl=FAVORITES_CACHE_TTL_SECONDS)
+
+
+def invalidate_favorites(user_id: Union[str, UUID]) -> None:
+    """Drop this worker's cached favorites for a user after they change."""
+    _favorites_cache.pop(str(user_id), None)
+
 
 class FavoritesUpdate(BaseModel):
     """Model for updating favorites."""
@@ -20,13 +31,13 @@ class FavoritesUpdate(BaseModel):
 
 class FavoritesDelete(BaseModel):
     """Model for deleting favorites."""
-    product_ids: List[int] = Field(..., min_items=1, description="List of product IDs to remove from favorites")
+    product_ids: List[int] = Field(..., min_length=1, description="List of product IDs to remove from favorites")
 
 
 @router.get("")
 @router.get("/")
 async def get_favorites(
-    user_id: Optional[str] = Query(None, description="Filter by user_id (UUID). Public read access - no authentication required."),
+    user_id: Optional[UUID] = Query(None, description="Filter by user_id (UUID). Public read access - no authentication required."),
     db: Client = Depends(get_db_client)
 ):
     """
@@ -34,41 +45,44 @@ async def get_favorites(
     Returns the user's favorites as JSONB (product_id string -> quantity integer, typically 1 for favorited).
     """
     try:
-        if not user_id:
+        if user_id is None:
             raise HTTPException(
                 status_code=400, 
                 detail="user_id query parameter is required"
             )
         
-        # Validate UUID format
-        try:
-            UUID(user_id)
-        except ValueError:
-            raise HTTPException(status_code=400, detail=f"Invalid user_id format: {user_id}")
+        # FastAPI has already parsed and validated the UUID; convert once for the query and response
+        user_id_str = str(user_id)
         
-        response = (
+        cached = _favorites_cache.get(user_id_str)
+        if cached is not None:
+            return cached
+        
+        response = await run_query(
             db.table("profiles")
             .select("id,favorites,created_at,updated_at")
-            .eq("id", user_id)
-            .execute()
+            .eq("id", user_id_str)
         )
         
         if not response.data or len(response.data) == 0:
             # Return empty favorites structure if user has no profile
-            return {
-                "user_id": user_id,
+            result = {
+                "user_id": user_id_str,
                 "favorites": {},
                 "created_at": None,
                 "updated_at": None
             }
+        else:
+            profile = response.data[0]
+            result = {
+                "user_id": profile.get("id"),
+                "favorites": profile.get("favorites", {}),
+                "created_at": profile.get("created_at"),
+                "updated_at": profile.get("updated_at")
+            }
         
-        profile = response.data[0]
-        return {
-            "user_id": profile.get("id"),
-            "favorites": profile.get("favorites", {}),
-            "created_at": profile.get("created_at"),
-            "updated_at": profile.get("updated_at")
-        }
+        _favorites_cache[user_id_str] = result
+        return result
     except HTTPException:
         raise
     except Exception as e:
@@ -89,82 +103,17 @@ async def update_favorites(
     Format: JSON object where keys are product_id strings and values are integer quantities (typically 1 for favorited).
     """
     try:
-        # Get existing profile
-        existing = (
-            db.table("profiles")
-            .select("id,favorites")
-            .eq("id", str(user_id))
-            .execute()
-        )
-        
-        # Get current favorites from database
-        if existing.data and len(existing.data) > 0:
-            current_favorites_raw = existing.data[0].get("favorites")
-        else:
-            current_favorites_raw = None
-        
-        # Handle current favorites - ensure it's a dict
-        if current_favorites_raw is None:
-            current_favorites = {}
-        elif isinstance(current_favorites_raw, dict):
-            current_favorites = current_favorites_raw
-        else:
-            # If it's not a dict, initialize as empty
-            current_favorites = {}
-        
-        # Normalize current favorites: ensure keys are strings and values are integers
-        normalized_current = {}
-        for k, v in current_favorites.items():
-            try:
-                key_str = str(k)
-                # Ensure value is an integer
-                if isinstance(v, (int, float)):
-                    val_int = int(v)
-                    if val_int > 0:  # Only keep positive quantities
-                        normalized_current[key_str] = val_int
-            except (ValueError, TypeError):
-                # Skip invalid entries
-                continue
-        
-        # Normalize new favorites: ensure keys are strings and values are integers
-        normalized_new = {}
-        for k, v in favorites_update.favorites.items():
-            try:
-                key_str = str(k)
-                # Ensure value is an integer
-                if isinstance(v, (int, float)):
-                    val_int = int(v)
-                    if val_int > 0:  # Only keep positive quantities
-                        normalized_new[key_str] = val_int
-            except (ValueError, TypeError):
-                # Skip invalid entries
-                continue
-        
-        # Merge (new favorites override existing)
-        merged_favorites = {**normalized_current, **normalized_new}
-        
-        # Update or insert profile
+        # Normalization and merge (new favorites override existing) happen in one
+        # statement in the merge_profile_favorites() database function, which also
+        # creates the profile if it doesn't exist yet
         # Note: Database trigger will update updated_at automatically
-        if existing.data and len(existing.data) > 0:
-            # Update existing profile
-            response = (
-                db.table("profiles")
-                .update({
-                    "favorites": merged_favorites
-                })
-                .eq("id", str(user_id))
-                .execute()
-            )
-        else:
-            # Insert new profile with favorites
-            response = (
-                db.table("profiles")
-                .insert({
-                    "id": str(user_id),
-                    "favorites": merged_favorites
-                })
-                .execute()
-            )
+        response = await run_query(
+            db.rpc("merge_profile_favorites", {
+                "p_user_id": str(user_id),
+                "p_favorites": favorites_update.favorites
+            })
+        )
+        invalidate_favorites(user_id)
         
         if not response.data or len(response.data) == 0:
             raise HTTPException(
@@ -200,61 +149,18 @@ async def delete_favorites(
     Delete favorites from the current user's favorites.
     """
     try:
-        # Get existing profile
-        existing = (
-            db.table("profiles")
-            .select("id,favorites")
-            .eq("id", str(user_id))
-            .execute()
-        )
-        
-        if not existing.data or len(existing.data) == 0:
-            raise HTTPException(status_code=404, detail="Profile not found")
-        
-        # Get current favorites from database
-        current_favorites_raw = existing.data[0].get("favorites")
-        
-        # Handle current favorites - ensure it's a dict
-        if current_favorites_raw is None:
-            current_favorites = {}
-        elif isinstance(current_favorites_raw, dict):
-            current_favorites = current_favorites_raw
-        else:
-            current_favorites = {}
-        
-        # Normalize current favorites: ensure keys are strings
-        normalized_current = {}
-        for k, v in current_favorites.items():
-            try:
-                key_str = str(k)
-                # Ensure value is an integer
-                if isinstance(v, (int, float)):
-                    val_int = int(v)
-                    if val_int > 0:
-                        normalized_current[key_str] = val_int
-            except (ValueError, TypeError):
-                continue
-        
-        # Convert product_ids to remove to strings
-        product_ids_to_remove = set(str(pid) for pid in favorites_delete.product_ids)
-        
-        # Remove requested favorites
-        updated_favorites = {k: v for k, v in normalized_current.items() if k not in product_ids_to_remove}
-        
-        response = (
-            db.table("profiles")
-            .update({
-                "favorites": updated_favorites
+        # Removal and re-normalization happen in one UPDATE in the
+        # remove_profile_favorites() database function
+        response = await run_query(
+            db.rpc("remove_profile_favorites", {
+                "p_user_id": str(user_id),
+                "p_product_ids": [str(pid) for pid in favorites_delete.product_ids]
             })
-            .eq("id", str(user_id))
-            .execute()
         )
+        invalidate_favorites(user_id)
         
         if not response.data or len(response.data) == 0:
-            raise HTTPException(
-                status_code=500, 
-                detail="Failed to delete favorites. The update may have been rejected by the database."
-            )
+            raise HTTPException(status_code=404, detail="Profile not found")
         
         profile = response.data[0]
         return {
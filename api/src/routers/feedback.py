@@ -2,17 +2,131 @@
 Feedback endpoint router.
 Allows users to submit feedback and notes to developers.
 """
-from typing import Optional
+import asyncio
+import logging
+from typing import Optional, List, Dict
 from uuid import UUID
-from fastapi import APIRouter, HTTPException, Depends, Body
+from fastapi import APIRouter, HTTPException, Depends, Body, status
 from pydantic import BaseModel, Field
 from supabase import Client
-from src.database import get_db_client
-from src.auth import get_user_id_from_token
-from fastapi import Header
+from src.database import run_query
+from src.auth import get_optional_user_id
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/feedback", tags=["feedback"])
 
+# Feedback is write-only from the client's point of view, so submissions are queued
+# and inserted in batches by a background task instead of one round-trip per request.
+FEEDBACK_BATCH_SIZE = 100
+FEEDBACK_FLUSH_INTERVAL_SECONDS = 0.1
+FEEDBACK_QUEUE_MAX_SIZE = 10000
+# How long shutdown waits for queued feedback to be flushed before giving up on it
+FEEDBACK_SHUTDOWN_TIMEOUT_SECONDS = 10
+
+_feedback_queue: Optional[asyncio.Queue] = None
+_feedback_task: Optional[asyncio.Task] = None
+_STOP = object()
+
+
+async def _insert_feedback_batch(db: Client, batch: List[Dict]) -> None:
+    """
+    Insert a batch of feedback rows. If the batch insert fails, each row is retried on its
+    own so one bad row or a transient error does not drop the rest; rows that still fail
+    are logged with their payload. Never raises, so the flusher keeps running.
+    """
+    try:
+        await run_query(
+            db.table("feedback")
+            .insert(batch, returning="minimal")
+        )
+        return
+    except Exception as e:
+        logger.warning(f"Batch insert of {len(batch)} feedback submission(s) failed, retrying individually: {str(e)}")
+    
+    for row in batch:
+        try:
+            await run_query(
+                db.table("feedback")
+                .insert(row, returning="minimal")
+            )
+        except Exception as e:
+            logger.error(f"Failed to insert feedback submission {row!r}: {str(e)}")
+
+
+async def _feedback_flusher(db: Client, queue: asyncio.Queue) -> None:
+    """
+    Pull feedback payloads off the queue and insert them in batches of up to
+    FEEDBACK_BATCH_SIZE, flushing at least every FEEDBACK_FLUSH_INTERVAL_SECONDS.
+    Returns once the stop sentinel is reached, after flushing everything queued before it.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        item = await queue.get()
+        if item is _STOP:
+            return
+        
+        batch = [item]
+        stopping = False
+        deadline = loop.time() + FEEDBACK_FLUSH_INTERVAL_SECONDS
+        while len(batch) < FEEDBACK_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is _STOP:
+                stopping = True
+                break
+            batch.append(item)
+        
+        await _insert_feedback_batch(db, batch)
+        if stopping:
+            return
+
+
+def start_feedback_flusher(db: Client) -> None:
+    """Create the feedback queue and start the background flusher. Called on app startup."""
+    global _feedback_queue, _feedback_task
+    _feedback_queue = asyncio.Queue(maxsize=FEEDBACK_QUEUE_MAX_SIZE)
+    _feedback_task = asyncio.create_task(_feedback_flusher(db, _feedback_queue))
+
+
+async def stop_feedback_flusher() -> None:
+    """
+    Flush any queued feedback and stop the background flusher. Called on app shutdown.
+    Never blocks on a full queue or a stalled insert: if the stop sentinel cannot be
+    queued, or the flush takes longer than FEEDBACK_SHUTDOWN_TIMEOUT_SECONDS, the
+    flusher is cancelled and the remaining feedback is dropped with a warning.
+    """
+    global _feedback_queue, _feedback_task
+    if _feedback_task is None:
+        return
+    try:
+        _feedback_queue.put_nowait(_STOP)
+    except asyncio.QueueFull:
+        logger.warning(f"Feedback queue is full on shutdown, dropping {_feedback_queue.qsize()} queued submission(s)")
+        _feedback_task.cancel()
+    
+    _, pending = await asyncio.wait({_feedback_task}, timeout=FEEDBACK_SHUTDOWN_TIMEOUT_SECONDS)
+    if pending:
+        logger.warning(f"Feedback flush did not finish within {FEEDBACK_SHUTDOWN_TIMEOUT_SECONDS}s, dropping unflushed submissions")
+        _feedback_task.cancel()
+    _feedback_queue = None
+    _feedback_task = None
+
+
+def _enqueue_feedback(insert_payload: Dict) -> None:
+    """Queue a feedback row for the background flusher."""
+    if _feedback_queue is None:
+        raise HTTPException(status_code=503, detail="Feedback service is not running")
+    try:
+        _feedback_queue.put_nowait(insert_payload)
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=503, detail="Too much feedback queued, please try again shortly")
+
 
 class FeedbackCreate(BaseModel):
     """Model for creating feedback."""
@@ -21,23 +135,20 @@ class FeedbackCreate(BaseModel):
     email: Optional[str] = Field(None, description="Optional email address (stored in database for manual review, no automatic emails sent)")
 
 
-@router.post("")
-@router.post("/")
+@router.post("", status_code=status.HTTP_202_ACCEPTED)
+@router.post("/", status_code=status.HTTP_202_ACCEPTED)
 async def create_feedback(
     feedback: FeedbackCreate = Body(...),
-    authorization: Optional[str] = Header(None),
-    db: Client = Depends(get_db_client)
+    user_id: Optional[UUID] = Depends(get_optional_user_id)
 ):
     """
     Submit feedback or a note to the developers.
     
     Public endpoint - authentication is optional. If authenticated, user_id will be automatically included.
     All feedback is saved to the database. Email addresses are stored for manual review only - no automatic emails are sent.
+    Returns 202 Accepted once the feedback is queued; it is written to the database in the background.
     """
     try:
-        # Get user_id from token if authenticated
-        user_id = get_user_id_from_token(authorization)
-        
         # Build insert payload
         insert_payload = {
             "message": feedback.message
@@ -53,21 +164,12 @@ async def create_feedback(
         if feedback.email:
             insert_payload["email"] = feedback.email
         
-        response = (
-            db.table("feedback")
-            .insert(insert_payload)
-            .execute()
-        )
-        
-        if not response.data:
-            raise HTTPException(status_code=500, detail="Failed to submit feedback")
-        
-        feedback_result = response.data[0]
+        # Saved to the database by the background flusher
+        _enqueue_feedback(insert_payload)
         
         return {
-            "feedback_id": feedback_result.get("feedback_id"),
-            "message": "Feedback submitted successfully",
-            "created_at": feedback_result.get("created_at")
+            "status": "accepted",
+            "message": "Feedback received"
         }
     except HTTPException:
         raise
@@ -75,17 +177,17 @@ async def create_feedback(
         raise HTTPException(status_code=500, detail=f"Error submitting feedback: {str(e)}")
 
 
-@router.post("/anonymous")
-@router.post("/anonymous/")
+@router.post("/anonymous", status_code=status.HTTP_202_ACCEPTED)
+@router.post("/anonymous/", status_code=status.HTTP_202_ACCEPTED)
 async def create_feedback_anonymous(
-    feedback: FeedbackCreate = Body(...),
-    db: Client = Depends(get_db_client)
+    feedback: FeedbackCreate = Body(...)
 ):
     """
     Submit feedback anonymously (without authentication).
     
     This endpoint does not require authentication and will not include a user_id.
     Useful for users who want to provide feedback without logging in.
+    Returns 202 Accepted once the feedback is queued; it is written to the database in the background.
     """
     try:
         # Build insert payload (no user_id for anonymous feedback)
@@ -99,21 +201,12 @@ async def create_feedback_anonymous(
         if feedback.email:
             insert_payload["email"] = feedback.email
         
-        response = (
-            db.table("feedback")
-            .insert(insert_payload)
-            .execute()
-        )
-        
-        if not response.data:
-            raise HTTPException(status_code=500, detail="Failed to submit feedback")
-        
-        feedback_result = response.data[0]
+        # Saved to the database by the background flusher
+        _enqueue_feedback(insert_payload)
         
         return {
-            "feedback_id": feedback_result.get("feedback_id"),
-            "message": "Feedback submitted successfully",
-            "created_at": feedback_result.get("created_at")
+            "status": "accepted",
+            "message": "Feedback received"
         }
     except HTTPException:
         raise
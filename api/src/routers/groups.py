@@ -1,57 +1,108 @@
 """
 Groups endpoint router.
 """
-from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Depends, Query
 from supabase import Client
-from src.database import get_db_client
-from src.models import PaginationParams, PaginatedResponse
+from src.database import get_db_client, run_query
+from src.models import PaginationParams, PaginatedResponse, encode_cursor, decode_cursor
+from src.cache_control import public_cache
 
 router = APIRouter(prefix="/groups", tags=["groups"])
 
+# Groups only change when a new set is synced
+group_cache = public_cache(max_age=3600, stale_while_revalidate=86400)
 
-@router.get("", response_model=PaginatedResponse[dict])
-@router.get("/", response_model=PaginatedResponse[dict])
+
+@router.get("", response_model=PaginatedResponse[dict], dependencies=[Depends(group_cache)])
+@router.get("/", response_model=PaginatedResponse[dict], dependencies=[Depends(group_cache)])
 async def list_groups(
     pagination: PaginationParams = Depends(),
+    cursor: Optional[str] = Query(None, description="Keyset pagination cursor (next_cursor from the previous page). When provided, page is ignored and total is not computed."),
     db: Client = Depends(get_db_client)
 ):
     """
     List all groups with pagination.
     Results are sorted by published_on (descending), then by group_id.
+    Pass next_cursor back as cursor to fetch the following page without an OFFSET scan.
     """
     try:
-        offset = (pagination.page - 1) * pagination.limit
-        
-        response = (
+        # Offset pages get the total from the same request; keyset pages skip the count.
+        # groups is small, so an exact count is cheap even unfiltered.
+        query = (
             db.table("groups")
-            .select("*")
+            .select("*", count="exact" if cursor is None else None)
             .order("published_on", desc=True)
             .order("group_id", desc=False)
-            .range(offset, offset + pagination.limit - 1)
-            .execute()
         )
         
-        count_response = (
-            db.table("groups")
-            .select("*", count="exact")
-            .execute()
-        )
-        total = count_response.count if count_response.count is not None else None
+        if cursor is None:
+            offset = (pagination.page - 1) * pagination.limit
+            
+            # Fetch one extra row to tell whether another page follows
+            response = await run_query(
+                query.range(offset, offset + pagination.limit)
+            )
+            groups = response.data if response.data else []
+            has_more = len(groups) > pagination.limit
+            groups = groups[:pagination.limit]
+            total = response.count
+        else:
+            try:
+                position = decode_cursor(cursor)
+                cursor_published_on = position["published_on"]
+                if cursor_published_on is not None:
+                    cursor_published_on = datetime.fromisoformat(cursor_published_on).isoformat()
+                cursor_group_id = int(position["group_id"])
+            except (ValueError, KeyError, TypeError):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            
+            # Rows strictly after the cursor in (published_on desc, group_id) order.
+            # Postgres sorts nulls first when descending, so a null cursor date still has
+            # every dated group ahead of it.
+            if cursor_published_on is None:
+                after_cursor = f"published_on.not.is.null,and(published_on.is.null,group_id.gt.{cursor_group_id})"
+            else:
+                after_cursor = (
+                    f'published_on.lt."{cursor_published_on}",'
+                    f'and(published_on.eq."{cursor_published_on}",group_id.gt.{cursor_group_id})'
+                )
+            
+            # The extra row only tells whether another page follows
+            response = await run_query(
+                query
+                .or_(after_cursor)
+                .limit(pagination.limit + 1)
+            )
+            groups = response.data if response.data else []
+            has_more = len(groups) > pagination.limit
+            groups = groups[:pagination.limit]
+            total = None
         
-        has_more = total is not None and (offset + pagination.limit) < total
+        next_cursor = None
+        if has_more and groups:
+            last = groups[-1]
+            next_cursor = encode_cursor({
+                "published_on": last.get("published_on"),
+                "group_id": last["group_id"]
+            })
         
         return PaginatedResponse(
-            data=response.data,
+            data=groups,
             page=pagination.page,
             limit=pagination.limit,
             total=total,
-            has_more=has_more
+            has_more=has_more,
+            next_cursor=next_cursor
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching groups: {str(e)}")
 
 
-@router.get("/{group_id}")
+@router.get("/{group_id}", dependencies=[Depends(group_cache)])
 async def get_group(
     group_id: int,
     db: Client = Depends(get_db_client)
@@ -60,11 +111,10 @@ async def get_group(
     Get a single group by primary key (group_id).
     """
     try:
-        response = (
+        response = await run_query(
             db.table("groups")
             .select("*")
             .eq("group_id", group_id)
-            .execute()
         )
         
         if not response.data:
@@ -90,32 +140,23 @@ async def get_groups_by_category(
     try:
         offset = (pagination.page - 1) * pagination.limit
         
-        response = (
+        # The total comes back with the rows; one extra row tells whether another page follows
+        response = await run_query(
             db.table("groups")
-            .select("*")
+            .select("*", count="exact")
             .eq("category_id", category_id)
             .order("published_on", desc=True)
             .order("group_id", desc=False)
-            .range(offset, offset + pagination.limit - 1)
-            .execute()
+            .range(offset, offset + pagination.limit)
         )
-        
-        count_response = (
-            db.table("groups")
-            .select("*", count="exact")
-            .eq("category_id", category_id)
-            .execute()
-        )
-        total = count_response.count if count_response.count is not None else None
-        
-        has_more = total is not None and (offset + pagination.limit) < total
+        groups = response.data if response.data else []
         
         return PaginatedResponse(
-            data=response.data,
+            data=groups[:pagination.limit],
             page=pagination.page,
             limit=pagination.limit,
-            total=total,
-            has_more=has_more
+            total=response.count,
+            has_more=len(groups) > pagination.limit
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching groups by category: {str(e)}")
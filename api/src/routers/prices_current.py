@@ -1,47 +1,64 @@
 """
 Current Prices endpoint router.
 """
+import asyncio
 import logging
 from typing import List
 from fastapi import APIRouter, HTTPException, Depends, Body, Request
 from pydantic import BaseModel, Field
 from supabase import Client
-from src.database import get_db_client
+from src.database import get_db_client, run_query
 from src.models import PaginationParams, PaginatedResponse
+from src.cache_control import public_cache
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/prices-current", tags=["prices-current"])
 
+# Product IDs per IN (...) query in bulk lookups, kept small enough for PostgREST's URL length limit
+PRICE_LOOKUP_BATCH_SIZE = 200
+
 
 class BulkPriceRequest(BaseModel):
     """Model for bulk price lookup request."""
-    product_ids: List[int] = Field(..., min_items=1, max_items=1000, description="List of product IDs to fetch")
+    product_ids: List[int] = Field(..., min_length=1, max_length=1000, description="List of product IDs to fetch")
 
 
-@router.get("")
-@router.get("/")
+@router.get("", response_model=PaginatedResponse[dict])
+@router.get("/", response_model=PaginatedResponse[dict])
 async def list_prices_current(
+    pagination: PaginationParams = Depends(),
     db: Client = Depends(get_db_client)
 ):
     """
-    List all current prices.
+    List current prices with pagination.
     Results are sorted by product_id.
     """
     try:
-        response = (
+        offset = (pagination.page - 1) * pagination.limit
+        
+        # The total is the planner's row estimate (an exact count would scan the whole table);
+        # one extra row tells whether another page follows
+        response = await run_query(
             db.table("prices_current")
-            .select("*")
+            .select("*", count="planned")
             .order("product_id", desc=False)
-            .execute()
+            .range(offset, offset + pagination.limit)
         )
+        prices = response.data if response.data else []
         
-        return response.data
+        return PaginatedResponse(
+            data=prices[:pagination.limit],
+            page=pagination.page,
+            limit=pagination.limit,
+            total=response.count,
+            has_more=len(prices) > pagination.limit
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching current prices: {str(e)}")
 
 
-@router.get("/{product_id}")
+@router.get("/{product_id}", dependencies=[Depends(public_cache(max_age=3600, stale_while_revalidate=86400))])
 async def get_price_current(
     product_id: int,
     db: Client = Depends(get_db_client)
@@ -50,11 +67,10 @@ async def get_price_current(
     Get current price for a single product by primary key (product_id).
     """
     try:
-        response = (
+        response = await run_query(
             db.table("prices_current")
             .select("*")
             .eq("product_id", product_id)
-            .execute()
         )
         
         if not response.data:
@@ -75,7 +91,8 @@ async def get_prices_current_bulk(
     """
     Get multiple current prices by their product IDs in bulk.
     
-    Accepts a list of product IDs and returns current prices for all matching products.
+    Accepts a list of product IDs and returns current prices for all matching products,
+    in the order the IDs were first requested. Duplicate IDs are returned once.
     Products that don't have prices will not be included in the response.
     
     **Limits:**
@@ -94,8 +111,8 @@ async def get_prices_current_bulk(
             f"BULK PRICES REQUEST: Received {len(request.product_ids)} product IDs. "
             f"First 10 IDs: {request.product_ids[:10]}"
         )
-        # Remove duplicates and validate
-        unique_product_ids = list(set(request.product_ids))
+        # Remove duplicates, keeping the first occurrence of each ID in request order
+        unique_product_ids = list(dict.fromkeys(request.product_ids))
         
         if len(unique_product_ids) > 1000:
             raise HTTPException(
@@ -103,36 +120,27 @@ async def get_prices_current_bulk(
                 detail="Maximum 1000 product IDs allowed per request"
             )
         
-        # Batch process if needed
-        batch_size = 1000
-        all_prices = []
-        
-        for i in range(0, len(unique_product_ids), batch_size):
-            batch = unique_product_ids[i:i + batch_size]
-            
-            response = (
+        # Look up the batches concurrently (at most 5 with the 1000 ID cap)
+        responses = await asyncio.gather(*(
+            run_query(
                 db.table("prices_current")
                 .select("*")
-                .in_("product_id", batch)
-                .execute()
+                .in_("product_id", unique_product_ids[i:i + PRICE_LOOKUP_BATCH_SIZE])
             )
-            
-            all_prices.extend(response.data)
+            for i in range(0, len(unique_product_ids), PRICE_LOOKUP_BATCH_SIZE)
+        ))
         
-        # Create a map for quick lookup
-        price_map = {price["product_id"]: price for price in all_prices}
+        # Build the lookup map straight from the batch responses
+        price_map = {price["product_id"]: price for response in responses for price in response.data}
         
-        # Return prices in the order requested (preserving order)
-        result = []
-        for product_id in request.product_ids:
-            if product_id in price_map:
-                result.append(price_map[product_id])
+        # Return prices in the order requested (each product once)
+        result = [price_map[product_id] for product_id in unique_product_ids if product_id in price_map]
         
         return {
             "prices": result,
-            "requested_count": len(request.product_ids),
+            "requested_count": len(unique_product_ids),
             "found_count": len(result),
-            "missing_count": len(request.product_ids) - len(result)
+            "missing_count": len(unique_product_ids) - len(result)
         }
     except HTTPException:
         raise
@@ -5,8 +5,8 @@ from typing import Optional
 from datetime import datetime
 from fastapi import APIRouter, HTTPException, Depends, Query
 from supabase import Client
-from src.database import get_db_client
-from src.models import PaginationParams, PaginatedResponse
+from src.database import get_db_client, run_query
+from src.models import PaginationParams, PaginatedResponse, encode_cursor, decode_cursor
 
 router = APIRouter(prefix="/prices-history", tags=["prices-history"])
 
@@ -24,16 +24,24 @@ async def list_prices_history(
         description="End date for filtering (ISO format: YYYY-MM-DDTHH:MM:SS or YYYY-MM-DD). Returns entries with fetched_at <= end_date."
     ),
     product_id: Optional[int] = Query(None, description="Filter by specific product ID"),
+    cursor: Optional[str] = Query(None, description="Keyset pagination cursor (next_cursor from the previous page). When provided, page is ignored and total is not computed."),
     db: Client = Depends(get_db_client)
 ):
     """
     List price history with pagination and optional date/product filtering.
     Results are sorted by product_id, then fetched_at.
+    Pass next_cursor back as cursor to fetch the following page without an OFFSET scan.
     """
     try:
-        offset = (pagination.page - 1) * pagination.limit
-        
-        query = db.table("prices_history").select("*")
+        # Offset pages get the total from the same request; keyset pages skip the count.
+        # Unfiltered, an exact count would scan the whole table, so the planner's estimate is used.
+        if cursor is not None:
+            count_mode = None
+        elif start_date or end_date or product_id:
+            count_mode = "exact"
+        else:
+            count_mode = "planned"
+        query = db.table("prices_history").select("*", count=count_mode)
         
         # Apply filters
         if start_date:
@@ -43,36 +51,60 @@ async def list_prices_history(
         if product_id:
             query = query.eq("product_id", product_id)
         
-        # Apply sorting and pagination
-        response = (
-            query
-            .order("product_id", desc=False)
-            .order("fetched_at", desc=False)
-            .range(offset, offset + pagination.limit - 1)
-            .execute()
-        )
-        
-        # Get total count
-        count_query = db.table("prices_history").select("*", count="exact")
-        if start_date:
-            count_query = count_query.gte("fetched_at", start_date.isoformat())
-        if end_date:
-            count_query = count_query.lte("fetched_at", end_date.isoformat())
-        if product_id:
-            count_query = count_query.eq("product_id", product_id)
-        
-        count_response = count_query.execute()
-        total = count_response.count if count_response.count is not None else None
+        query = query.order("product_id", desc=False).order("fetched_at", desc=False)
         
-        has_more = total is not None and (offset + pagination.limit) < total
+        if cursor is None:
+            offset = (pagination.page - 1) * pagination.limit
+            
+            # Apply pagination, fetching one extra row to tell whether another page follows
+            response = await run_query(
+                query.range(offset, offset + pagination.limit)
+            )
+            prices = response.data if response.data else []
+            has_more = len(prices) > pagination.limit
+            prices = prices[:pagination.limit]
+            total = response.count
+        else:
+            try:
+                position = decode_cursor(cursor)
+                cursor_product_id = int(position["product_id"])
+                cursor_fetched_at = datetime.fromisoformat(position["fetched_at"]).isoformat()
+            except (ValueError, KeyError, TypeError):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            
+            # Rows strictly after the cursor in (product_id, fetched_at) order; the extra
+            # row only tells whether another page follows
+            response = await run_query(
+                query
+                .or_(
+                    f"product_id.gt.{cursor_product_id},"
+                    f'and(product_id.eq.{cursor_product_id},fetched_at.gt."{cursor_fetched_at}")'
+                )
+                .limit(pagination.limit + 1)
+            )
+            prices = response.data if response.data else []
+            has_more = len(prices) > pagination.limit
+            prices = prices[:pagination.limit]
+            total = None
+        
+        next_cursor = None
+        if has_more and prices:
+            last = prices[-1]
+            next_cursor = encode_cursor({
+                "product_id": last["product_id"],
+                "fetched_at": last["fetched_at"]
+            })
         
         return PaginatedResponse(
-            data=response.data,
+            data=prices,
             page=pagination.page,
             limit=pagination.limit,
             total=total,
-            has_more=has_more
+            has_more=has_more,
+            next_cursor=next_cursor
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching price history: {str(e)}")
 
@@ -99,9 +131,10 @@ async def get_prices_history_by_product(
     try:
         offset = (pagination.page - 1) * pagination.limit
         
+        # The total comes back with the rows
         query = (
             db.table("prices_history")
-            .select("*")
+            .select("*", count="exact")
             .eq("product_id", product_id)
         )
         
@@ -111,37 +144,21 @@ async def get_prices_history_by_product(
         if end_date:
             query = query.lte("fetched_at", end_date.isoformat())
         
-        # Apply sorting and pagination
-        response = (
+        # Apply sorting and pagination, fetching one extra row to tell whether another page follows
+        response = await run_query(
             query
             .order("product_id", desc=False)
             .order("fetched_at", desc=False)
-            .range(offset, offset + pagination.limit - 1)
-            .execute()
+            .range(offset, offset + pagination.limit)
         )
-        
-        # Get total count
-        count_query = (
-            db.table("prices_history")
-            .select("*", count="exact")
-            .eq("product_id", product_id)
-        )
-        if start_date:
-            count_query = count_query.gte("fetched_at", start_date.isoformat())
-        if end_date:
-            count_query = count_query.lte("fetched_at", end_date.isoformat())
-        
-        count_response = count_query.execute()
-        total = count_response.count if count_response.count is not None else None
-        
-        has_more = total is not None and (offset + pagination.limit) < total
+        prices = response.data if response.data else []
         
         return PaginatedResponse(
-            data=response.data,
+            data=prices[:pagination.limit],
             page=pagination.page,
             limit=pagination.limit,
-            total=total,
-            has_more=has_more
+            total=response.count,
+            has_more=len(prices) > pagination.limit
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching price history by product: {str(e)}")
@@ -157,12 +174,11 @@ async def get_price_history_by_product_date(
     Get a single price history entry by composite primary key (product_id, fetched_at).
     """
     try:
-        response = (
+        response = await run_query(
             db.table("prices_history")
             .select("*")
             .eq("product_id", product_id)
             .eq("fetched_at", fetched_at.isoformat())
-            .execute()
         )
         
         if not response.data:
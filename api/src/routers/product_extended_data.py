@@ -1,59 +1,101 @@
 """
 Product Extended Data endpoint router.
 """
-import json
 from typing import Optional
+from cachetools import TTLCache
 from fastapi import APIRouter, HTTPException, Depends, Query
 from supabase import Client
-from src.database import get_db_client
-from src.models import PaginationParams, PaginatedResponse
+from src.database import get_db_client, run_query
+from src.models import PaginationParams, PaginatedResponse, encode_cursor, decode_cursor, quote_filter_value
+from src.cache_control import public_cache
 
 router = APIRouter(prefix="/product-extended-data", tags=["product-extended-data"])
 
+# Filter options only change when the product sync runs, so key-value maps are cached per worker.
+# Each worker refreshes a category at most once per TTL.
+KEY_VALUES_CACHE_TTL_SECONDS = 3600
+_key_values_cache = TTLCache(maxsize=256, ttl=KEY_VALUES_CACHE_TTL_SECONDS)
+
 
 @router.get("", response_model=PaginatedResponse[dict])
 @router.get("/", response_model=PaginatedResponse[dict])
 async def list_product_extended_data(
     pagination: PaginationParams = Depends(),
+    cursor: Optional[str] = Query(None, description="Keyset pagination cursor (next_cursor from the previous page). When provided, page is ignored and total is not computed."),
     db: Client = Depends(get_db_client)
 ):
     """
     List all product extended data entries with pagination.
     Results are sorted by product_id, then key (composite primary key).
+    Pass next_cursor back as cursor to fetch the following page without an OFFSET scan.
     """
     try:
-        # Calculate offset for pagination
-        offset = (pagination.page - 1) * pagination.limit
-        
-        # Query with pagination and sorting by composite primary key
-        # Sort by product_id first, then by key
-        response = (
+        # Sort by composite primary key: product_id first, then key.
+        # Offset pages get the planner's row estimate as the total from the same request
+        # (an exact count would scan the whole table); keyset pages skip the count.
+        query = (
             db.table("product_extended_data")
-            .select("*")
+            .select("*", count="planned" if cursor is None else None)
             .order("product_id", desc=False)
             .order("key", desc=False)
-            .range(offset, offset + pagination.limit - 1)
-            .execute()
         )
         
-        # Get total count for pagination metadata
-        count_response = (
-            db.table("product_extended_data")
-            .select("*", count="exact")
-            .execute()
-        )
-        total = count_response.count if count_response.count is not None else None
+        if cursor is None:
+            # Calculate offset for pagination
+            offset = (pagination.page - 1) * pagination.limit
+            
+            # Fetch one extra row to tell whether another page follows
+            response = await run_query(
+                query.range(offset, offset + pagination.limit)
+            )
+            entries = response.data if response.data else []
+            has_more = len(entries) > pagination.limit
+            entries = entries[:pagination.limit]
+            total = response.count
+        else:
+            try:
+                position = decode_cursor(cursor)
+                cursor_product_id = int(position["product_id"])
+                cursor_key = position["key"]
+                if not isinstance(cursor_key, str):
+                    raise TypeError("key must be a string")
+            except (ValueError, KeyError, TypeError):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            
+            # Rows strictly after the cursor in (product_id, key) order; the extra row only
+            # tells whether another page follows. Keys are free text, so they are quoted.
+            quoted_key = quote_filter_value(cursor_key)
+            response = await run_query(
+                query
+                .or_(
+                    f"product_id.gt.{cursor_product_id},"
+                    f"and(product_id.eq.{cursor_product_id},key.gt.{quoted_key})"
+                )
+                .limit(pagination.limit + 1)
+            )
+            entries = response.data if response.data else []
+            has_more = len(entries) > pagination.limit
+            entries = entries[:pagination.limit]
+            total = None
         
-        # Determine if there are more pages
-        has_more = total is not None and (offset + pagination.limit) < total
+        next_cursor = None
+        if has_more and entries:
+            last = entries[-1]
+            next_cursor = encode_cursor({
+                "product_id": last["product_id"],
+                "key": last["key"]
+            })
         
         return PaginatedResponse(
-            data=response.data,
+            data=entries,
             page=pagination.page,
             limit=pagination.limit,
             total=total,
-            has_more=has_more
+            has_more=has_more,
+            next_cursor=next_cursor
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching product extended data: {str(e)}")
 
@@ -72,55 +114,24 @@ async def get_extended_data_by_category(
         # Calculate offset for pagination
         offset = (pagination.page - 1) * pagination.limit
         
-        # Use inner join through products table to filter by category_id
-        # First get product_ids for this category
-        products_response = (
-            db.table("products")
-            .select("product_id")
-            .eq("category_id", category_id)
-            .execute()
-        )
-        
-        product_ids = [p["product_id"] for p in products_response.data] if products_response.data else []
-        
-        if not product_ids:
-            return PaginatedResponse(
-                data=[],
-                page=pagination.page,
-                limit=pagination.limit,
-                total=0,
-                has_more=False
-            )
-        
-        # Query extended data for these products
-        response = (
-            db.table("product_extended_data")
-            .select("*")
-            .in_("product_id", product_ids)
+        # The extended_data_by_category() database function joins through products, so the
+        # category's product_ids never leave Postgres. Ordering and paging are applied to the
+        # function result; the total comes back with the rows and one extra row tells whether
+        # another page follows.
+        response = await run_query(
+            db.rpc("extended_data_by_category", {"p_category_id": category_id}, count="exact")
             .order("product_id", desc=False)
             .order("key", desc=False)
-            .range(offset, offset + pagination.limit - 1)
-            .execute()
+            .range(offset, offset + pagination.limit)
         )
-        
-        # Get total count for pagination metadata
-        count_response = (
-            db.table("product_extended_data")
-            .select("*", count="exact")
-            .in_("product_id", product_ids)
-            .execute()
-        )
-        total = count_response.count if count_response.count is not None else None
-        
-        # Determine if there are more pages
-        has_more = total is not None and (offset + pagination.limit) < total
+        entries = response.data if response.data else []
         
         return PaginatedResponse(
-            data=response.data,
+            data=entries[:pagination.limit],
             page=pagination.page,
             limit=pagination.limit,
-            total=total,
-            has_more=has_more
+            total=response.count,
+            has_more=len(entries) > pagination.limit
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching extended data by category: {str(e)}")
@@ -137,59 +148,31 @@ async def get_keys_by_category(
     Returns distinct key names.
     """
     try:
-        # Use inner join through products table to filter by category_id
-        # First get product_ids for this category
-        products_response = (
-            db.table("products")
-            .select("product_id")
-            .eq("category_id", category_id)
-            .execute()
-        )
-        
-        product_ids = [p["product_id"] for p in products_response.data] if products_response.data else []
-        
-        if not product_ids:
-            return PaginatedResponse(
-                data=[],
-                page=pagination.page,
-                limit=pagination.limit,
-                total=0,
-                has_more=False
-            )
-        
-        # Get all extended data for these products
-        all_data = (
-            db.table("product_extended_data")
-            .select("key")
-            .in_("product_id", product_ids)
-            .execute()
-        )
-        
-        # Extract unique keys
-        unique_keys = sorted(set(item["key"] for item in all_data.data if item.get("key")))
-        
-        # Apply pagination manually
         offset = (pagination.page - 1) * pagination.limit
-        paginated_keys = unique_keys[offset:offset + pagination.limit]
         
-        total = len(unique_keys)
-        has_more = (offset + pagination.limit) < total
-        
-        # Format as list of objects with key field
-        data = [{"key": key} for key in paginated_keys]
+        # The extended_data_keys_by_category() database function returns the category's distinct
+        # keys, so only one page of keys leaves Postgres. Ordering and paging are applied to the
+        # function result; the total (number of distinct keys) comes back with the rows and one
+        # extra row tells whether another page follows.
+        response = await run_query(
+            db.rpc("extended_data_keys_by_category", {"p_category_id": category_id}, count="exact")
+            .order("key", desc=False)
+            .range(offset, offset + pagination.limit)
+        )
+        keys = response.data if response.data else []
         
         return PaginatedResponse(
-            data=data,
+            data=keys[:pagination.limit],
             page=pagination.page,
             limit=pagination.limit,
-            total=total,
-            has_more=has_more
+            total=response.count,
+            has_more=len(keys) > pagination.limit
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching keys by category: {str(e)}")
 
 
-@router.get("/by-category/{category_id}/key-values")
+@router.get("/by-category/{category_id}/key-values", dependencies=[Depends(public_cache(max_age=86400))])
 async def get_unique_key_value_pairs_by_category(
     category_id: int,
     db: Client = Depends(get_db_client)
@@ -199,96 +182,32 @@ async def get_unique_key_value_pairs_by_category(
     Returns a dictionary mapping each key to a list of unique values.
     Useful for building filter UIs.
     
-    This endpoint parses extended_data_raw JSON from products directly,
-    which is more efficient than querying the product_extended_data table.
+    The extended_key_values_by_category() database function parses extended_data_raw
+    and aggregates the distinct values per key inside Postgres, so one request returns
+    the whole map. Description, Number and Trait are excluded.
     """
+    cached = _key_values_cache.get(category_id)
+    if cached is not None:
+        return cached
+    
     try:
-        # Query products with extended_data_raw field for this category
-        # Use pagination to handle large datasets efficiently
-        key_values = {}  # Dictionary to store key -> set of unique values
-        
-        # Fetch products in batches to handle large categories
-        page = 1
-        limit = 1000
-        has_more = True
-        
-        while has_more:
-            offset = (page - 1) * limit
-            
-            # Query products with extended_data_raw field
-            products_response = (
-                db.table("products")
-                .select("extended_data_raw")
-                .eq("category_id", category_id)
-                .not_.is_("extended_data_raw", "null")
-                .range(offset, offset + limit - 1)
-                .execute()
-            )
-            
-            if not products_response.data:
-                break
-            
-            # Parse extended_data_raw for each product and build key-value map
-            for product in products_response.data:
-                extended_data_raw = product.get("extended_data_raw")
-                
-                # Skip if null, empty, or not present
-                if not extended_data_raw:
-                    continue
-                
-                # Parse JSON string (extended_data_raw is stored as a JSON string)
-                try:
-                    # Handle both string and already-parsed cases
-                    if isinstance(extended_data_raw, str):
-                        # Parse the JSON string
-                        # Handle empty string case
-                        if not extended_data_raw.strip():
-                            continue
-                        data = json.loads(extended_data_raw)
-                    elif isinstance(extended_data_raw, dict):
-                        # Already parsed (shouldn't happen with jsonb, but handle it)
-                        data = extended_data_raw
-                    else:
-                        # Unexpected type, skip
-                        continue
-                    
-                    # Process each key-value pair
-                    if isinstance(data, list) and data:
-                        for d in data:
-                            key = d["name"]
-                            value = d["value"]
-                            if key in ("Description", "Number", "Trait"):
-                                continue
-
-                            # Initialize set for this key if not exists
-                            if key not in key_values:
-                                key_values[key] = set()
-                            
-                            # Add value to set (handles None, empty strings, etc.)
-                            if value is not None:
-                                # Convert value to string for consistency
-                                value_str = str(value).strip()
-                                if value_str:
-                                    key_values[key].add(value_str)
-                
-                except (json.JSONDecodeError, TypeError, AttributeError, ValueError) as e:
-                    # Skip products with invalid JSON in extended_data_raw
-                    # Continue processing other products
-                    continue
-            
-            # Check if there are more products to fetch
-            has_more = len(products_response.data) == limit
-            page += 1
-        
-        # Convert sets to sorted lists for final result
-        result = {key: sorted(list(values)) for key, values in key_values.items()}
+        response = await run_query(
+            db.rpc("extended_key_values_by_category", {"p_category_id": category_id})
+        )
         
+        # Values are sorted here so their order follows Python string ordering, not the database collation
+        result = {row["key"]: sorted(row["values"]) for row in (response.data or [])}
+        _key_values_cache[category_id] = result
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching unique key-value pairs by category: {str(e)}")
 
 
-@router.get("/by-product/{product_id}", response_model=PaginatedResponse[dict])
+@router.get(
+    "/by-product/{product_id}",
+    response_model=PaginatedResponse[dict],
+    dependencies=[Depends(public_cache(max_age=3600, stale_while_revalidate=86400))]
+)
 async def get_extended_data_by_product(
     product_id: int,
     pagination: PaginationParams = Depends(),
@@ -302,35 +221,24 @@ async def get_extended_data_by_product(
         # Calculate offset for pagination
         offset = (pagination.page - 1) * pagination.limit
         
-        # Query extended data by product_id with pagination
-        response = (
+        # Query extended data by product_id with pagination; the total comes back with the
+        # rows and one extra row tells whether another page follows
+        response = await run_query(
             db.table("product_extended_data")
-            .select("*")
+            .select("*", count="exact")
             .eq("product_id", product_id)
             .order("product_id", desc=False)
             .order("key", desc=False)
-            .range(offset, offset + pagination.limit - 1)
-            .execute()
+            .range(offset, offset + pagination.limit)
         )
-        
-        # Get total count for pagination metadata
-        count_response = (
-            db.table("product_extended_data")
-            .select("*", count="exact")
-            .eq("product_id", product_id)
-            .execute()
-        )
-        total = count_response.count if count_response.count is not None else None
-        
-        # Determine if there are more pages
-        has_more = total is not None and (offset + pagination.limit) < total
+        entries = response.data if response.data else []
         
         return PaginatedResponse(
-            data=response.data,
+            data=entries[:pagination.limit],
             page=pagination.page,
             limit=pagination.limit,
-            total=total,
-            has_more=has_more
+            total=response.count,
+            has_more=len(entries) > pagination.limit
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching extended data by product: {str(e)}")
@@ -346,12 +254,11 @@ async def get_product_extended_data(
     Get a single product extended data entry by composite primary key (product_id, key).
     """
     try:
-        response = (
+        response = await run_query(
             db.table("product_extended_data")
             .select("*")
             .eq("product_id", product_id)
             .eq("key", key)
-            .execute()
         )
         
         if not response.data:
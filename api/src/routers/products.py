@@ -1,18 +1,39 @@
 """
 Products endpoint router.
 """
+import asyncio
+import json
 import logging
-from typing import Optional, Dict, List, Union
+from typing import Any, Optional, Dict, List, Tuple, Union
+from cachetools import TTLCache
 from fastapi import APIRouter, HTTPException, Depends, Body, Query
 from pydantic import BaseModel, Field
 from supabase import Client
-from src.database import get_db_client
-from src.models import PaginationParams, PaginatedResponse
+from src.database import get_db_client, run_query
+from src.models import PaginationParams, PaginatedResponse, encode_cursor, decode_cursor, quote_filter_value
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+# Columns returned for products, including the cached attribute columns and number
+# (synced via trigger from product_extended_data)
+PRODUCT_COLUMNS = "product_id,category_id,group_id,name,clean_name,image_url,url,fixed_amount,number,short_number,extended_data_raw,rarity,color,type,level,cost,atk,hp,modified_on,fetched_at"
+
+# Columns accepted in sort_columns. Sort columns end up in the order clause and the
+# keyset cursor filter, so anything else is rejected before a query is built
+SORTABLE_PRODUCT_COLUMNS = frozenset(PRODUCT_COLUMNS.split(","))
+
+# Product totals only change when the catalog is synced, so each worker caches them per
+# endpoint and filters; later pages with the same filters skip the count query
+PRODUCT_COUNT_CACHE_TTL_SECONDS = 60
+_product_count_cache = TTLCache(maxsize=1024, ttl=PRODUCT_COUNT_CACHE_TTL_SECONDS)
+
+# Whole pages are cached per worker for a short time, keyed by endpoint and every request
+# parameter, so repeated identical list and search requests skip Supabase entirely
+PRODUCT_PAGE_CACHE_TTL_SECONDS = 30
+_product_page_cache = TTLCache(maxsize=1024, ttl=PRODUCT_PAGE_CACHE_TTL_SECONDS)
+
 
 def map_sort_columns(sort_columns: List[str]) -> List[str]:
     """
@@ -28,19 +49,27 @@ def map_sort_columns(sort_columns: List[str]) -> List[str]:
     return ["short_number" if col == "number" else col for col in sort_columns]
 
 
-def apply_sorting(query, sort_columns: List[str], sort_direction: Union[str, List[str]] = "asc"):
+def product_sort_keys(sort_columns: List[str], sort_direction: Union[str, List[str]] = "asc") -> List[Tuple[str, bool]]:
     """
-    Apply multiple order clauses to a Supabase query.
-    Maps "number" to "short_number" for proper numeric sorting.
+    Resolve the requested sort into (column, descending) pairs.
+    Maps "number" to "short_number" for proper numeric sorting, drops repeated columns
+    (only the first occurrence affects the order) and appends product_id as a final
+    tiebreaker so the order is total and pages never overlap.
     
     Args:
-        query: The Supabase query object
         sort_columns: List of column names to sort by (in order)
         sort_direction: "asc" or "desc" (default: "asc"), or a list of directions (one per column)
     
     Returns:
-        The query object with order clauses applied
+        List of (column, descending) pairs
+    
+    Raises:
+        HTTPException: 400 if a column is not a product column or the directions do not match the columns
     """
+    invalid_columns = [col for col in sort_columns if col not in SORTABLE_PRODUCT_COLUMNS]
+    if invalid_columns:
+        raise HTTPException(status_code=400, detail=f"Invalid sort_columns: {', '.join(invalid_columns)}")
+    
     # Map "number" to "short_number" for numeric sorting
     final_sort_columns = map_sort_columns(sort_columns)
     
@@ -51,17 +80,165 @@ def apply_sorting(query, sort_columns: List[str], sort_direction: Union[str, Lis
     else:
         # Per-column directions
         if len(sort_direction) != len(sort_columns):
-            raise ValueError(f"sort_direction list length ({len(sort_direction)}) must match sort_columns length ({len(sort_columns)})")
+            raise HTTPException(status_code=400, detail=f"sort_direction list length ({len(sort_direction)}) must match sort_columns length ({len(sort_columns)})")
         directions = [d.lower() for d in sort_direction]
     
-    # Apply each order clause using multiple .order() calls
+    sort_keys = []
+    seen = set()
     for column, direction in zip(final_sort_columns, directions):
-        desc = direction == "desc"
+        if column not in seen:
+            seen.add(column)
+            sort_keys.append((column, direction == "desc"))
+    if "product_id" not in seen:
+        sort_keys.append(("product_id", False))
+    return sort_keys
+
+
+def apply_sorting(query, sort_keys: List[Tuple[str, bool]]):
+    """
+    Apply multiple order clauses to a Supabase query.
+    
+    Args:
+        query: The Supabase query object
+        sort_keys: (column, descending) pairs from product_sort_keys
+    
+    Returns:
+        The query object with order clauses applied
+    """
+    # Apply each order clause using multiple .order() calls
+    for column, desc in sort_keys:
         query = query.order(column, desc=desc)
     
     return query
 
 
+def _filter_literal(value) -> str:
+    """Format a sort-key value from a cursor as a PostgREST filter operand."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return quote_filter_value(str(value))
+
+
+def keyset_filter(sort_keys: List[Tuple[str, bool]], position: Dict[str, Any]) -> str:
+    """
+    Build a PostgREST or=() expression matching the rows strictly after position in the
+    order given by sort_keys: for each column, rows equal on every earlier column and
+    after position on this one. Postgres sorts nulls last ascending and first descending.
+    """
+    branches = []
+    equal_so_far = []
+    for column, desc in sort_keys:
+        value = position[column]
+        if value is None:
+            # Nothing sorts after null ascending; every non-null value does descending
+            after = f"{column}.not.is.null" if desc else None
+        elif desc:
+            after = f"{column}.lt.{_filter_literal(value)}"
+        else:
+            after = f"or({column}.gt.{_filter_literal(value)},{column}.is.null)"
+        
+        if after is not None:
+            conditions = [*equal_so_far, after]
+            branches.append(conditions[0] if len(conditions) == 1 else f"and({','.join(conditions)})")
+        
+        equal_so_far.append(f"{column}.is.null" if value is None else f"{column}.eq.{_filter_literal(value)}")
+    return ",".join(branches)
+
+
+def encode_product_cursor(sort_keys: List[Tuple[str, bool]], row: dict) -> Optional[str]:
+    """Cursor for the page following row, or None if row lacks a sort column (e.g. one that is not selected)."""
+    if any(column not in row for column, _ in sort_keys):
+        return None
+    return encode_cursor({column: row[column] for column, _ in sort_keys})
+
+
+def decode_product_cursor(sort_keys: List[Tuple[str, bool]], cursor: str) -> Dict[str, Any]:
+    """Decode a products cursor, rejecting cursors issued for a different sort order."""
+    try:
+        position = decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if set(position) != {column for column, _ in sort_keys} or not all(
+        value is None or isinstance(value, (str, int, float, bool)) for value in position.values()
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor: it does not match the requested sort order")
+    return position
+
+
+async def fetch_page_after_cursor(query, sort_keys: List[Tuple[str, bool]], cursor: str, limit: int) -> Tuple[List[dict], bool]:
+    """
+    Fetch the page following a cursor from a sorted products query.
+    One extra row is fetched to tell whether another page follows.
+    
+    Returns:
+        Tuple of (rows, has_more)
+    """
+    position = decode_product_cursor(sort_keys, cursor)
+    response = await run_query(
+        query
+        .or_(keyset_filter(sort_keys, position))
+        .limit(limit + 1)
+    )
+    rows = response.data if response.data else []
+    return rows[:limit], len(rows) > limit
+
+
+async def cached_count(cache_key: tuple, count_query) -> Optional[int]:
+    """
+    Return the total for a count-only products query, reusing the cached total for
+    the same cache_key (endpoint and filters) while it is fresh.
+    """
+    total = _product_count_cache.get(cache_key)
+    if total is None:
+        response = await run_query(count_query)
+        total = response.count
+        if total is not None:
+            _product_count_cache[cache_key] = total
+    return total
+
+
+def filter_signature(request: BaseModel) -> str:
+    """Canonical form of a filter/search request body without its sort fields, for count cache keys."""
+    return json.dumps(
+        request.model_dump(exclude={"sort_columns", "sort_direction"}),
+        sort_keys=True,
+        default=str
+    )
+
+
+def name_search_pattern(q: str) -> str:
+    """
+    Normalize a search query into an ILIKE pattern that matches it anywhere in clean_name.
+    Parentheses, brackets and quotes are removed, "+" becomes "plus", dashes become spaces,
+    and % and _ are escaped so they match literally.
+    """
+    normalized_q = q
+    for char in ['(', ')', '[', ']', "'", '"', "`"]:
+        normalized_q = normalized_q.replace(char, '')
+    normalized_q = normalized_q.replace('+', 'plus').replace('-', ' ')
+    escaped_q = normalized_q.replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped_q}%"
+
+
+# Lower-cased filter key -> cached column in the products table
+FILTER_KEY_COLUMNS = {
+    "rarity": "rarity",
+    "color": "color",
+    "type": "type",
+    "cardtype": "type",  # Accept "CardType" as an alias for "type"
+    "level": "level",
+    "cost": "cost",
+    "atk": "atk",
+    "attack": "atk",
+    "hp": "hp",
+}
+
+# Cached columns stored as integers; filter values for these are converted with int()
+INTEGER_FILTER_COLUMNS = frozenset({"level", "cost", "atk", "hp"})
+
+
 def map_filter_key_to_column(key: str) -> Optional[str]:
     """
     Map a filter key to its corresponding column in the products table.
@@ -72,19 +249,7 @@ def map_filter_key_to_column(key: str) -> Optional[str]:
     Returns:
         Column name in products table, or None if not a cached column
     """
-    key_lower = key.lower()
-    mapping = {
-        "rarity": "rarity",
-        "color": "color",
-        "type": "type",
-        "cardtype": "type",  # Accept "CardType" as an alias for "type"
-        "level": "level",
-        "cost": "cost",
-        "atk": "atk",
-        "attack": "atk",
-        "hp": "hp",
-    }
-    return mapping.get(key_lower)
+    return FILTER_KEY_COLUMNS.get(key.lower())
 
 
 class ProductFilter(BaseModel):
@@ -116,49 +281,75 @@ async def list_products(
     pagination: PaginationParams = Depends(),
     sort_columns: Optional[List[str]] = Query(default=["color", "type", "rarity", "level", "cost"], description="List of column names to sort by (in order)"),
     sort_direction: Optional[Union[str, List[str]]] = Query(default="asc", description="Sort direction: 'asc' or 'desc', or a list of directions (one per column in sort_columns). If a list, length must match sort_columns length."),
+    cursor: Optional[str] = Query(None, description="Keyset pagination cursor (next_cursor from the previous page). When provided, page is ignored and total is not computed. Pass the same sort_columns and sort_direction as the first page."),
     db: Client = Depends(get_db_client)
 ):
     """
     List all products with pagination.
     Results are sorted by the specified columns (default: color, type, rarity, level, cost in ascending order).
+    Ties are broken by product_id. Pass next_cursor back as cursor to fetch the following page without an OFFSET scan.
     """
+    cache_key = ("list", json.dumps([sort_columns, sort_direction]), pagination.page, pagination.limit, cursor)
+    cached = _product_page_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        # Calculate offset for pagination
-        offset = (pagination.page - 1) * pagination.limit
+        sort_keys = product_sort_keys(sort_columns, sort_direction)
         
         # Query with pagination and custom sorting
         # Include number column (synced via trigger from product_extended_data) and extended_data_raw
         try:
             query = (
                 db.table("products")
-                .select("product_id,category_id,group_id,name,clean_name,image_url,url,fixed_amount,number,short_number,extended_data_raw,rarity,color,type,level,cost,atk,hp,modified_on,fetched_at")
+                .select(PRODUCT_COLUMNS)
                 .not_.is_("number", "null")
             )
-            query = apply_sorting(query, sort_columns, sort_direction)
-            response = query.range(offset, offset + pagination.limit - 1).execute()
+            query = apply_sorting(query, sort_keys)
+            
+            if cursor is None:
+                # Calculate offset for pagination
+                offset = (pagination.page - 1) * pagination.limit
+                
+                # The total is counted with different filters than the page query, so it needs
+                # its own (cached) request; the two are independent and run concurrently
+                response, total = await asyncio.gather(
+                    run_query(query.range(offset, offset + pagination.limit - 1)),
+                    cached_count(
+                        ("list",),
+                        db.table("products")
+                        .select("product_id", count="exact", head=True)
+                        .not_.is_("type", "null")
+                    )
+                )
+                products = response.data if response.data else []
+                
+                # Determine if there are more pages
+                has_more = total is not None and (offset + pagination.limit) < total
+            else:
+                # Seek past the cursor instead of scanning offset rows; the total is not recomputed
+                products, has_more = await fetch_page_after_cursor(query, sort_keys, cursor, pagination.limit)
+                total = None
+        except HTTPException:
+            raise
         except Exception as col_error:
             logger.error(f"Error querying products: {str(col_error)}", exc_info=True)
             raise HTTPException(status_code=500, detail=f"Error fetching products: {str(col_error)}")
         
-        # Get total count for pagination metadata
-        count_response = (
-            db.table("products")
-            .select("*", count="exact")
-            .not_.is_("type", "null")
-            .execute()
-        )
-        total = count_response.count if count_response.count is not None else None
-        
-        # Determine if there are more pages
-        has_more = total is not None and (offset + pagination.limit) < total
+        next_cursor = encode_product_cursor(sort_keys, products[-1]) if has_more and products else None
         
-        return PaginatedResponse(
-            data=response.data,
+        result = PaginatedResponse(
+            data=products,
             page=pagination.page,
             limit=pagination.limit,
             total=total,
-            has_more=has_more
+            has_more=has_more,
+            next_cursor=next_cursor
         )
+        _product_page_cache[cache_key] = result
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching products: {str(e)}")
 
@@ -169,50 +360,76 @@ async def get_products_by_category(
     pagination: PaginationParams = Depends(),
     sort_columns: Optional[List[str]] = Query(default=["color", "type", "rarity", "level", "cost"], description="List of column names to sort by (in order)"),
     sort_direction: Optional[Union[str, List[str]]] = Query(default="asc", description="Sort direction: 'asc' or 'desc', or a list of directions (one per column in sort_columns). If a list, length must match sort_columns length."),
+    cursor: Optional[str] = Query(None, description="Keyset pagination cursor (next_cursor from the previous page). When provided, page is ignored and total is not computed. Pass the same sort_columns and sort_direction as the first page."),
     db: Client = Depends(get_db_client)
 ):
     """
     Get all products for a specific category (filtered by foreign key category_id).
     Results are sorted by the specified columns (default: color, type, rarity, level, cost in ascending order).
+    Ties are broken by product_id. Pass next_cursor back as cursor to fetch the following page without an OFFSET scan.
     """
+    cache_key = ("by-category", category_id, json.dumps([sort_columns, sort_direction]), pagination.page, pagination.limit, cursor)
+    cached = _product_page_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        # Calculate offset for pagination
-        offset = (pagination.page - 1) * pagination.limit
+        sort_keys = product_sort_keys(sort_columns, sort_direction)
         
         # Query products by category_id with pagination and custom sorting
         # Include number column (synced via trigger from product_extended_data) and extended_data_raw
         try:
             query = (
                 db.table("products")
-                .select("product_id,category_id,group_id,name,clean_name,image_url,url,fixed_amount,number,short_number,extended_data_raw,rarity,color,type,level,cost,atk,hp,modified_on,fetched_at")
+                .select(PRODUCT_COLUMNS)
                 .eq("category_id", category_id)
                 .not_.is_("number", "null")
             )
-            query = apply_sorting(query, sort_columns, sort_direction)
-            response = query.range(offset, offset + pagination.limit - 1).execute()
+            query = apply_sorting(query, sort_keys)
+            
+            if cursor is None:
+                # Calculate offset for pagination
+                offset = (pagination.page - 1) * pagination.limit
+                
+                # The total is counted with different filters than the page query, so it needs
+                # its own (cached) request; the two are independent and run concurrently
+                response, total = await asyncio.gather(
+                    run_query(query.range(offset, offset + pagination.limit - 1)),
+                    cached_count(
+                        ("by-category", category_id),
+                        db.table("products")
+                        .select("product_id", count="exact", head=True)
+                        .eq("category_id", category_id)
+                    )
+                )
+                products = response.data if response.data else []
+                
+                # Determine if there are more pages
+                has_more = total is not None and (offset + pagination.limit) < total
+            else:
+                # Seek past the cursor instead of scanning offset rows; the total is not recomputed
+                products, has_more = await fetch_page_after_cursor(query, sort_keys, cursor, pagination.limit)
+                total = None
+        except HTTPException:
+            raise
         except Exception as col_error:
             logger.error(f"Error querying products by category: {str(col_error)}", exc_info=True)
             raise HTTPException(status_code=500, detail=f"Error fetching products by category: {str(col_error)}")
         
-        # Get total count for pagination metadata
-        count_response = (
-            db.table("products")
-            .select("*", count="exact")
-            .eq("category_id", category_id)
-            .execute()
-        )
-        total = count_response.count if count_response.count is not None else None
-        
-        # Determine if there are more pages
-        has_more = total is not None and (offset + pagination.limit) < total
+        next_cursor = encode_product_cursor(sort_keys, products[-1]) if has_more and products else None
         
-        return PaginatedResponse(
-            data=response.data,
+        result = PaginatedResponse(
+            data=products,
             page=pagination.page,
             limit=pagination.limit,
             total=total,
-            has_more=has_more
+            has_more=has_more,
+            next_cursor=next_cursor
         )
+        _product_page_cache[cache_key] = result
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching products by category: {str(e)}")
 
@@ -223,50 +440,76 @@ async def get_products_by_group(
     pagination: PaginationParams = Depends(),
     sort_columns: Optional[List[str]] = Query(default=["color", "type", "rarity", "level", "cost"], description="List of column names to sort by (in order)"),
     sort_direction: Optional[Union[str, List[str]]] = Query(default="asc", description="Sort direction: 'asc' or 'desc', or a list of directions (one per column in sort_columns). If a list, length must match sort_columns length."),
+    cursor: Optional[str] = Query(None, description="Keyset pagination cursor (next_cursor from the previous page). When provided, page is ignored and total is not computed. Pass the same sort_columns and sort_direction as the first page."),
     db: Client = Depends(get_db_client)
 ):
     """
     Get all products for a specific group (filtered by foreign key group_id).
     Results are sorted by the specified columns (default: color, type, rarity, level, cost in ascending order).
+    Ties are broken by product_id. Pass next_cursor back as cursor to fetch the following page without an OFFSET scan.
     """
+    cache_key = ("by-group", group_id, json.dumps([sort_columns, sort_direction]), pagination.page, pagination.limit, cursor)
+    cached = _product_page_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        # Calculate offset for pagination
-        offset = (pagination.page - 1) * pagination.limit
+        sort_keys = product_sort_keys(sort_columns, sort_direction)
         
         # Query products by group_id with pagination and custom sorting
         # Include number column (synced via trigger from product_extended_data) and extended_data_raw
         try:
             query = (
                 db.table("products")
-                .select("product_id,category_id,group_id,name,clean_name,image_url,url,fixed_amount,number,short_number,extended_data_raw,rarity,color,type,level,cost,atk,hp,modified_on,fetched_at")
+                .select(PRODUCT_COLUMNS)
                 .eq("group_id", group_id)
                 .not_.is_("number", "null")
             )
-            query = apply_sorting(query, sort_columns, sort_direction)
-            response = query.range(offset, offset + pagination.limit - 1).execute()
+            query = apply_sorting(query, sort_keys)
+            
+            if cursor is None:
+                # Calculate offset for pagination
+                offset = (pagination.page - 1) * pagination.limit
+                
+                # The total is counted with different filters than the page query, so it needs
+                # its own (cached) request; the two are independent and run concurrently
+                response, total = await asyncio.gather(
+                    run_query(query.range(offset, offset + pagination.limit - 1)),
+                    cached_count(
+                        ("by-group", group_id),
+                        db.table("products")
+                        .select("product_id", count="exact", head=True)
+                        .eq("group_id", group_id)
+                    )
+                )
+                products = response.data if response.data else []
+                
+                # Determine if there are more pages
+                has_more = total is not None and (offset + pagination.limit) < total
+            else:
+                # Seek past the cursor instead of scanning offset rows; the total is not recomputed
+                products, has_more = await fetch_page_after_cursor(query, sort_keys, cursor, pagination.limit)
+                total = None
+        except HTTPException:
+            raise
         except Exception as col_error:
             logger.error(f"Error querying products by group: {str(col_error)}", exc_info=True)
             raise HTTPException(status_code=500, detail=f"Error fetching products by group: {str(col_error)}")
         
-        # Get total count for pagination metadata
-        count_response = (
-            db.table("products")
-            .select("*", count="exact")
-            .eq("group_id", group_id)
-            .execute()
-        )
-        total = count_response.count if count_response.count is not None else None
-        
-        # Determine if there are more pages
-        has_more = total is not None and (offset + pagination.limit) < total
+        next_cursor = encode_product_cursor(sort_keys, products[-1]) if has_more and products else None
         
-        return PaginatedResponse(
-            data=response.data,
+        result = PaginatedResponse(
+            data=products,
             page=pagination.page,
             limit=pagination.limit,
             total=total,
-            has_more=has_more
+            has_more=has_more,
+            next_cursor=next_cursor
         )
+        _product_page_cache[cache_key] = result
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching products by group: {str(e)}")
 
@@ -275,6 +518,7 @@ async def get_products_by_group(
 async def filter_products(
     filter_data: ProductFilter = Body(...),
     pagination: PaginationParams = Depends(),
+    cursor: Optional[str] = Query(None, description="Keyset pagination cursor (next_cursor from the previous page). When provided, page is ignored and total is not computed. Send the same filters and sort as the first page."),
     db: Client = Depends(get_db_client)
 ):
     """
@@ -289,6 +533,7 @@ async def filter_products(
     - If numbers is provided, products are filtered by number column (multiple numbers use OR logic)
     - All filters (category_id, group_id, product_ids, numbers, and filters dict) are combined with AND logic
     - Results are sorted by the specified columns (default: color, type, rarity, level, cost in ascending order)
+    - Ties are broken by product_id; pass next_cursor back as cursor to fetch the following page without an OFFSET scan
     
     **Supported Filter Keys (mapped to cached columns):**
     - "Rarity" -> rarity column
@@ -308,6 +553,11 @@ async def filter_products(
     - {"product_ids": [12345, 67890, 11111]} - Products with product_id=12345 OR product_id=67890 OR product_id=11111
     - {"product_ids": [12345, 67890], "category_id": 5} - Products with (product_id=12345 OR product_id=67890) AND category_id=5
     """
+    cache_key = ("filter", json.dumps(filter_data.model_dump(), sort_keys=True, default=str), pagination.page, pagination.limit, cursor)
+    cached = _product_page_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
         # Log incoming request at debug level to avoid noisy logs in production
         logger.debug(
@@ -337,14 +587,22 @@ async def filter_products(
                     logger.warning(f"  Invalid sort_direction value: {direction}")
                     raise HTTPException(status_code=400, detail="Each sort_direction value must be 'asc' or 'desc'")
         
+        sort_keys = product_sort_keys(filter_data.sort_columns, filter_data.sort_direction)
+        
         # Calculate offset for pagination
         offset = (pagination.page - 1) * pagination.limit
         
+        # The total counts the same filters as the page, so when it is not cached PostgREST
+        # returns it with the page itself; cursor pages never need it
+        count_key = ("filter", filter_signature(filter_data))
+        total = _product_count_cache.get(count_key)
+        count_mode = "exact" if cursor is None and total is None else None
+        
         # Build a single query that applies all filters directly on the products table
         try:
             query = (
                 db.table("products")
-                .select("product_id,category_id,group_id,name,clean_name,image_url,url,fixed_amount,number,short_number,extended_data_raw,rarity,color,type,level,cost,atk,hp,modified_on,fetched_at")
+                .select(PRODUCT_COLUMNS, count=count_mode)
                 .not_.is_("number", "null")
             )
             
@@ -392,7 +650,7 @@ async def filter_products(
                         continue
                     
                     # For integer columns, convert values to integers
-                    if column in ["level", "cost", "atk", "hp"]:
+                    if column in INTEGER_FILTER_COLUMNS:
                         try:
                             values = [int(v) for v in values if v is not None]
                         except (ValueError, TypeError) as e:
@@ -406,10 +664,27 @@ async def filter_products(
                         query = query.in_(column, values)
             
             # Apply custom sorting
-            query = apply_sorting(query, filter_data.sort_columns, filter_data.sort_direction)
+            query = apply_sorting(query, sort_keys)
+            
+            if cursor is not None:
+                # Seek past the cursor instead of scanning offset rows; the total is not recomputed
+                products, has_more = await fetch_page_after_cursor(query, sort_keys, cursor, pagination.limit)
+                result = PaginatedResponse(
+                    data=products,
+                    page=pagination.page,
+                    limit=pagination.limit,
+                    total=None,
+                    has_more=has_more,
+                    next_cursor=encode_product_cursor(sort_keys, products[-1]) if has_more and products else None
+                )
+                _product_page_cache[cache_key] = result
+                return result
             
             # Execute the sorted query and store the response
-            sorted_response = query.range(offset, offset + pagination.limit - 1).execute()
+            sorted_response = await run_query(query.range(offset, offset + pagination.limit - 1))
+            if total is None and sorted_response.count is not None:
+                total = sorted_response.count
+                _product_count_cache[count_key] = total
             
             # Optionally log the first result at debug level to verify sorting
             if logger.isEnabledFor(logging.DEBUG) and sorted_response.data:
@@ -422,52 +697,6 @@ async def filter_products(
                     f"group_id={first_product.get('group_id')}"
                 )
             
-            # Get total count for pagination metadata (separate query, doesn't affect sorted data)
-            try:
-                # Build count query with same filters
-                count_query = db.table("products").select("product_id", count="exact").not_.is_("number", "null")
-                
-                if filter_data.category_id:
-                    count_query = count_query.eq("category_id", filter_data.category_id)
-                if filter_data.group_id:
-                    if isinstance(filter_data.group_id, list):
-                        # Multiple group_ids - use OR logic
-                        count_query = count_query.in_("group_id", filter_data.group_id)
-                    else:
-                        # Single group_id
-                        count_query = count_query.eq("group_id", filter_data.group_id)
-                if filter_data.product_ids:
-                    count_query = count_query.in_("product_id", filter_data.product_ids)
-                if filter_data.numbers:
-                    number_values = [str(num) for num in filter_data.numbers if num is not None]
-                    if number_values:
-                        count_query = count_query.in_("number", number_values)
-                if filter_data.filters:
-                    for key, value in filter_data.filters.items():
-                        if value is None:
-                            continue
-                        column = map_filter_key_to_column(key)
-                        if column is None:
-                            continue
-                        values = [value] if isinstance(value, str) else value
-                        if not values:
-                            continue
-                        if column in ["level", "cost", "atk", "hp"]:
-                            try:
-                                values = [int(v) for v in values if v is not None]
-                            except (ValueError, TypeError):
-                                continue
-                        if len(values) == 1:
-                            count_query = count_query.eq(column, values[0])
-                        else:
-                            count_query = count_query.in_(column, values)
-                
-                count_response = count_query.execute()
-                total = count_response.count if count_response.count is not None else 0
-            except Exception:
-                # If count fails, we can't provide total
-                total = None
-            
             has_more = total is not None and (offset + pagination.limit) < total
             
             # Log summary at debug level only
@@ -476,13 +705,18 @@ async def filter_products(
                 f"(page={pagination.page}, limit={pagination.limit}, total={total}, has_more={has_more})"
             )
             
-            return PaginatedResponse(
+            result = PaginatedResponse(
                 data=sorted_response.data,
                 page=pagination.page,
                 limit=pagination.limit,
                 total=total,
-                has_more=has_more
+                has_more=has_more,
+                next_cursor=encode_product_cursor(sort_keys, sorted_response.data[-1]) if has_more and sorted_response.data else None
             )
+            _product_page_cache[cache_key] = result
+            return result
+        except HTTPException:
+            raise
         except Exception as col_error:
             logger.error(f"Error querying filtered products: {str(col_error)}", exc_info=True)
             raise HTTPException(status_code=500, detail=f"Error filtering products: {str(col_error)}")
@@ -497,6 +731,7 @@ async def filter_products(
 async def search_products(
     search_data: ProductSearchRequest = Body(...),
     pagination: PaginationParams = Depends(),
+    cursor: Optional[str] = Query(None, description="Keyset pagination cursor (next_cursor from the previous page). When provided, page is ignored and total is not computed. Send the same filters and sort as the first page."),
     db: Client = Depends(get_db_client)
 ):
     """
@@ -506,6 +741,7 @@ async def search_products(
     Can be combined with filters for category, group, product_ids, numbers, and attribute filters.
     If no search query is provided, only the filters are applied (similar to /products/filter).
     Results are sorted by the specified columns (default: color, type, rarity, level, cost in ascending order).
+    Ties are broken by product_id. Pass next_cursor back as cursor to fetch the following page without an OFFSET scan.
     
     **Filter Logic:**
     - If `q` is provided, name search uses partial matching (e.g., "pika" matches "Pikachu", "Pikachu VMAX")
@@ -527,6 +763,11 @@ async def search_products(
     - {"q": "char", "filters": {"Rarity": "Rare"}} - Products with "char" in name AND Rarity=Rare
     - {"q": "pika", "category_id": 5} - Products with "pika" in name AND category_id=5
     """
+    cache_key = ("search", json.dumps(search_data.model_dump(), sort_keys=True, default=str), pagination.page, pagination.limit, cursor)
+    cached = _product_page_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
         # Validate sort direction
         if isinstance(search_data.sort_direction, str):
@@ -539,63 +780,29 @@ async def search_products(
                 if direction not in ["asc", "desc"]:
                     raise HTTPException(status_code=400, detail="Each sort_direction value must be 'asc' or 'desc'")
         
+        sort_keys = product_sort_keys(search_data.sort_columns, search_data.sort_direction)
+        
         # Calculate offset for pagination
         offset = (pagination.page - 1) * pagination.limit
         
+        # The total counts the same filters as the page, so when it is not cached PostgREST
+        # returns it with the page itself; cursor pages never need it
+        count_key = ("search", filter_signature(search_data))
+        total = _product_count_cache.get(count_key)
+        count_mode = "exact" if cursor is None and total is None else None
+        
         # Build query with optional name search and all filters
         try:
             query = (
                 db.table("products")
-                .select("product_id,category_id,group_id,name,clean_name,image_url,url,fixed_amount,number,short_number,extended_data_raw,rarity,color,type,level,cost,atk,hp,modified_on,fetched_at")
+                .select(PRODUCT_COLUMNS, count=count_mode)
                 .not_.is_("number", "null")
             )
             
-            # Apply name search filter if query is provided
-            # Search against clean_name column with normalized query
+            # Apply name search filter if query is provided (partial match on clean_name;
+            # a pg_trgm index on clean_name keeps the leading-wildcard ILIKE off a sequential scan)
             if search_data.q:
-                # Normalize the search query:
-                # - Remove special characters: parentheses, brackets, single/double quotes
-                # - Replace + with "plus"
-                # - Replace dashes with spaces
-                normalized_q = search_data.q
-                # Remove special characters
-                for char in ['(', ')', '[', ']', "'", '"', "`"]:
-                    normalized_q = normalized_q.replace(char, '')
-                # Replace + with "plus"
-                normalized_q = normalized_q.replace('+', 'plus')
-                # Replace dashes with spaces
-                normalized_q = normalized_q.replace('-', ' ')
-                # Escape any existing % or _ in the normalized query to treat them as literals
-                escaped_q = normalized_q.replace("%", "\\%").replace("_", "\\_")
-                # Add wildcards on both sides for partial matching anywhere
-                # This pattern will match "chu" in "pikachu", "pikachu vmax", etc.
-                pattern = f"%{escaped_q}%"
-                # Use OR logic to match against clean_name OR number column
-                # PostgREST syntax: or=(clean_name.ilike.*pattern*,number.ilike.*pattern*)
-                # We'll use ilike for both to support partial matching on number as well
-                number_pattern = f"%{escaped_q}%"
-                # Try to use PostgREST's or filter syntax by setting it on session params
-                try:
-                    # Access the query's session to set the or filter directly
-                    if hasattr(query, 'session'):
-                        session = query.session
-                        # Try different ways to set the or parameter
-                        if hasattr(session, 'params'):
-                            # PostgREST or filter format: or=(condition1,condition2)
-                            or_filter = f"clean_name.ilike.{pattern},number.ilike.{number_pattern}"
-                            session.params['or'] = or_filter
-                        elif hasattr(session, '_params'):
-                            or_filter = f"clean_name.ilike.{pattern},number.ilike.{number_pattern}"
-                            session._params['or'] = or_filter
-                        else:
-                            # Fallback: just match clean_name
-                            query = query.ilike("clean_name", pattern)
-                    else:
-                        # Fallback: just match clean_name
-                        query = query.ilike("clean_name", pattern)
-                except Exception:
-                    # Fallback: just match clean_name if or filter doesn't work
-                    query = query.ilike("clean_name", pattern)
+                query = query.ilike("clean_name", name_search_pattern(search_data.q))
             
             # Apply category filter if provided
             if search_data.category_id:
@@ -634,7 +841,7 @@ async def search_products(
                         continue
                     
                     # For integer columns, convert values to integers
-                    if column in ["level", "cost", "atk", "hp"]:
+                    if column in INTEGER_FILTER_COLUMNS:
                         try:
                             values = [int(v) for v in values if v is not None]
                         except (ValueError, TypeError) as e:
@@ -648,101 +855,42 @@ async def search_products(
                         query = query.in_(column, values)
             
             # Apply custom sorting
-            query = apply_sorting(query, search_data.sort_columns, search_data.sort_direction)
+            query = apply_sorting(query, sort_keys)
             
-            # Execute the sorted query
-            sorted_response = query.range(offset, offset + pagination.limit - 1).execute()
+            if cursor is not None:
+                # Seek past the cursor instead of scanning offset rows; the total is not recomputed
+                products, has_more = await fetch_page_after_cursor(query, sort_keys, cursor, pagination.limit)
+                result = PaginatedResponse(
+                    data=products,
+                    page=pagination.page,
+                    limit=pagination.limit,
+                    total=None,
+                    has_more=has_more,
+                    next_cursor=encode_product_cursor(sort_keys, products[-1]) if has_more and products else None
+                )
+                _product_page_cache[cache_key] = result
+                return result
             
-            # Get total count for pagination metadata (with same filters)
-            try:
-                count_query = db.table("products").select("product_id", count="exact").not_.is_("number", "null")
-                
-                # Apply name search filter if query is provided
-                # Search against clean_name column with normalized query (same normalization as main query)
-                if search_data.q:
-                    # Normalize the search query (same as main query):
-                    # - Remove special characters: parentheses, brackets, single/double quotes
-                    # - Replace + with "plus"
-                    # - Replace dashes with spaces
-                    normalized_q = search_data.q
-                    # Remove special characters
-                    for char in ['(', ')', '[', ']', "'", '"']:
-                        normalized_q = normalized_q.replace(char, '')
-                    # Replace + with "plus"
-                    normalized_q = normalized_q.replace('+', 'plus')
-                    # Replace dashes with spaces
-                    normalized_q = normalized_q.replace('-', ' ')
-                    # Escape any existing % or _ in the normalized query to treat them as literals
-                    escaped_q = normalized_q.replace("%", "\\%").replace("_", "\\_")
-                    # Add wildcards on both sides for partial matching anywhere
-                    pattern = f"%{escaped_q}%"
-                    # Use OR logic to match against clean_name OR number column (same as main query)
-                    number_pattern = f"%{escaped_q}%"
-                    # Try to use PostgREST's or filter syntax by setting it on session params
-                    try:
-                        if hasattr(count_query, 'session'):
-                            session = count_query.session
-                            if hasattr(session, 'params'):
-                                or_filter = f"clean_name.ilike.{pattern},number.ilike.{number_pattern}"
-                                session.params['or'] = or_filter
-                            elif hasattr(session, '_params'):
-                                or_filter = f"clean_name.ilike.{pattern},number.ilike.{number_pattern}"
-                                session._params['or'] = or_filter
-                            else:
-                                count_query = count_query.ilike("clean_name", pattern)
-                        else:
-                            count_query = count_query.ilike("clean_name", pattern)
-                    except Exception:
-                        # Fallback: just use clean_name
-                        count_query = count_query.ilike("clean_name", pattern)
-                
-                if search_data.category_id:
-                    count_query = count_query.eq("category_id", search_data.category_id)
-                if search_data.group_id:
-                    if isinstance(search_data.group_id, list):
-                        count_query = count_query.in_("group_id", search_data.group_id)
-                    else:
-                        count_query = count_query.eq("group_id", search_data.group_id)
-                if search_data.product_ids:
-                    count_query = count_query.in_("product_id", search_data.product_ids)
-                if search_data.numbers:
-                    number_values = [str(num) for num in search_data.numbers if num is not None]
-                    if number_values:
-                        count_query = count_query.in_("number", number_values)
-                if search_data.filters and len(search_data.filters) > 0:
-                    for key, value in search_data.filters.items():
-                        if value is None:
-                            continue
-                        column = map_filter_key_to_column(key)
-                        if column is None:
-                            continue
-                        values = [value] if isinstance(value, str) else value
-                        if not values:
-                            continue
-                        if column in ["level", "cost", "atk", "hp"]:
-                            try:
-                                values = [int(v) for v in values if v is not None]
-                            except (ValueError, TypeError):
-                                continue
-                        if len(values) == 1:
-                            count_query = count_query.eq(column, values[0])
-                        else:
-                            count_query = count_query.in_(column, values)
-                
-                count_response = count_query.execute()
-                total = count_response.count if count_response.count is not None else 0
-            except Exception:
-                total = None
+            # Execute the sorted query and store the response
+            sorted_response = await run_query(query.range(offset, offset + pagination.limit - 1))
+            if total is None and sorted_response.count is not None:
+                total = sorted_response.count
+                _product_count_cache[count_key] = total
             
             has_more = total is not None and (offset + pagination.limit) < total
             
-            return PaginatedResponse(
+            result = PaginatedResponse(
                 data=sorted_response.data,
                 page=pagination.page,
                 limit=pagination.limit,
                 total=total,
-                has_more=has_more
+                has_more=has_more,
+                next_cursor=encode_product_cursor(sort_keys, sorted_response.data[-1]) if has_more and sorted_response.data else None
             )
+            _product_page_cache[cache_key] = result
+            return result
+        except HTTPException:
+            raise
         except Exception as col_error:
             logger.error(f"Error searching products: {str(col_error)}", exc_info=True)
             raise HTTPException(status_code=500, detail=f"Error searching products: {str(col_error)}")
@@ -763,12 +911,11 @@ async def get_product(
     """
     try:
         try:
-            response = (
+            response = await run_query(
                 db.table("products")
-                .select("product_id,category_id,group_id,name,clean_name,image_url,url,fixed_amount,number,short_number,extended_data_raw,rarity,color,type,level,cost,atk,hp,modified_on,fetched_at")
+                .select(PRODUCT_COLUMNS)
                 .eq("product_id", product_id)
                 .not_.is_("number", "null")
-                .execute()
             )
         except Exception as col_error:
             logger.error(f"Error querying product: {str(col_error)}", exc_info=True)
@@ -7,8 +7,10 @@ from uuid import UUID
 from fastapi import APIRouter, HTTPException, Depends, Body, Query
 from pydantic import BaseModel, Field
 from supabase import Client
-from src.database import get_db_client
+from src.database import get_db_client, run_query
 from src.auth import require_auth
+from src.models import normalize_item_quantities
+from src.routers.favorites import invalidate_favorites
 
 router = APIRouter(prefix="/profiles", tags=["profiles"])
 
@@ -28,7 +30,7 @@ class ProfileUpdate(BaseModel):
 @router.get("")
 @router.get("/")
 async def get_profile(
-    user_id: Optional[str] = Query(None, description="User ID (UUID) to get profile for. Either user_id or username is required."),
+    user_id: Optional[UUID] = Query(None, description="User ID (UUID) to get profile for. Either user_id or username is required."),
     username: Optional[str] = Query(None, description="Username to get profile for. Either user_id or username is required."),
     db: Client = Depends(get_db_client)
 ):
@@ -46,40 +48,27 @@ async def get_profile(
                 detail="Either user_id or username query parameter is required"
             )
         
-        # If both are provided, user_id takes precedence
-        if user_id and username:
-            # Validate UUID format if user_id is provided
-            try:
-                UUID(user_id)
-            except ValueError:
-                raise HTTPException(status_code=400, detail=f"Invalid user_id format: {user_id}")
-        
-        # If username is provided, look up the user_id first
+        # If username is provided, look up the user_id first (user_id takes precedence if both are given)
         if username and not user_id:
-            username_response = (
+            username_response = await run_query(
                 db.table("profiles")
                 .select("id")
                 .eq("username", username)
-                .execute()
             )
             
             if not username_response.data or len(username_response.data) == 0:
                 raise HTTPException(status_code=404, detail=f"Profile not found for username: {username}")
             
             user_id = username_response.data[0].get("id")
-        elif user_id:
-            # Validate UUID format
-            try:
-                UUID(user_id)
-            except ValueError:
-                raise HTTPException(status_code=400, detail=f"Invalid user_id format: {user_id}")
+        else:
+            # UUID format is validated by the query parameter type
+            user_id = str(user_id)
         
         # Get profile by user_id
-        response = (
+        response = await run_query(
             db.table("profiles")
             .select("id,username,avatar_url,currency,items,favorites,total_count,tcg_percentage,created_at,updated_at")
             .eq("id", user_id)
-            .execute()
         )
         
         if not response.data or len(response.data) == 0:
@@ -120,29 +109,11 @@ async def update_profile(
             update_payload["currency"] = profile_update.currency
         if profile_update.items is not None:
             # Normalize items: ensure keys are strings and values are integers
-            normalized_items = {}
-            for k, v in profile_update.items.items():
-                try:
-                    key_str = str(k)
-                    if isinstance(v, (int, float)):
-                        val_int = int(v)
-                        if val_int > 0:  # Only keep positive quantities
-                            normalized_items[key_str] = val_int
-                except (ValueError, TypeError):
-                    continue
+            normalized_items = normalize_item_quantities(profile_update.items)
             update_payload["items"] = normalized_items
         if profile_update.favorites is not None:
             # Normalize favorites: ensure keys are strings and values are integers
-            normalized_favorites = {}
-            for k, v in profile_update.favorites.items():
-                try:
-                    key_str = str(k)
-                    if isinstance(v, (int, float)):
-                        val_int = int(v)
-                        if val_int > 0:  # Only keep positive quantities
-                            normalized_favorites[key_str] = val_int
-                except (ValueError, TypeError):
-                    continue
+            normalized_favorites = normalize_item_quantities(profile_update.favorites)
             update_payload["favorites"] = normalized_favorites
         if profile_update.total_count is not None:
             update_payload["total_count"] = profile_update.total_count
@@ -153,28 +124,25 @@ async def update_profile(
             raise HTTPException(status_code=400, detail="No fields provided to update")
         
         # Check if profile exists
-        existing = (
+        existing = await run_query(
             db.table("profiles")
             .select("id")
             .eq("id", user_id)
-            .execute()
         )
         
         if existing.data and len(existing.data) > 0:
             # Update existing profile (only for authenticated user's own profile)
-            response = (
+            response = await run_query(
                 db.table("profiles")
                 .update(update_payload)
                 .eq("id", user_id)
-                .execute()
             )
         else:
             # Insert new profile
             update_payload["id"] = user_id
-            response = (
+            response = await run_query(
                 db.table("profiles")
                 .insert(update_payload)
-                .execute()
             )
         
         if not response.data or len(response.data) == 0:
@@ -183,6 +151,9 @@ async def update_profile(
                 detail="Failed to update profile. The update may have been rejected by the database."
             )
         
+        if profile_update.favorites is not None:
+            invalidate_favorites(user_id)
+        
         # Return full profile including full_name (user viewing their own profile)
         return response.data[0]
     except HTTPException:
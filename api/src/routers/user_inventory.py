@@ -7,8 +7,9 @@ from uuid import UUID
 from fastapi import APIRouter, HTTPException, Depends, Body, Query
 from pydantic import BaseModel, Field
 from supabase import Client
-from src.database import get_db_client
+from src.database import get_db_client, run_query
 from src.auth import require_auth
+from src.models import normalize_item_quantities
 
 router = APIRouter(prefix="/user-inventory", tags=["user-inventory"])
 
@@ -20,18 +21,13 @@ class InventoryItemsUpdate(BaseModel):
 
 class InventoryItemsDelete(BaseModel):
     """Model for deleting inventory items."""
-    product_ids: List[int] = Field(..., min_items=1, description="List of product IDs to remove")
-
-
-def calculate_total_count(items: Dict[str, int]) -> int:
-    """Calculate total item count from items dictionary."""
-    return sum(items.values()) if items else 0
+    product_ids: List[int] = Field(..., min_length=1, description="List of product IDs to remove")
 
 
 @router.get("")
 @router.get("/")
 async def get_inventory(
-    user_id: Optional[str] = Query(None, description="Filter by user_id (UUID). Either user_id or username is required."),
+    user_id: Optional[UUID] = Query(None, description="Filter by user_id (UUID). Either user_id or username is required."),
     username: Optional[str] = Query(None, description="Filter by username. Either user_id or username is required."),
     db: Client = Depends(get_db_client)
 ):
@@ -48,21 +44,12 @@ async def get_inventory(
                 detail="Either user_id or username query parameter is required"
             )
         
-        # If both are provided, user_id takes precedence
-        if user_id and username:
-            # Validate UUID format if user_id is provided
-            try:
-                UUID(user_id)
-            except ValueError:
-                raise HTTPException(status_code=400, detail=f"Invalid user_id format: {user_id}")
-        
-        # If username is provided, look up the user_id first
+        # If username is provided, look up the user_id first (user_id takes precedence if both are given)
         if username and not user_id:
-            username_response = (
+            username_response = await run_query(
                 db.table("profiles")
                 .select("id")
                 .eq("username", username)
-                .execute()
             )
             
             if not username_response.data or len(username_response.data) == 0:
@@ -77,19 +64,15 @@ async def get_inventory(
                 }
             
             user_id = username_response.data[0].get("id")
-        elif user_id:
-            # Validate UUID format
-            try:
-                UUID(user_id)
-            except ValueError:
-                raise HTTPException(status_code=400, detail=f"Invalid user_id format: {user_id}")
+        else:
+            # UUID format is validated by the query parameter type
+            user_id = str(user_id)
         
         # Get inventory by user_id
-        response = (
+        response = await run_query(
             db.table("profiles")
             .select("id,username,items,total_count,created_at,updated_at")
             .eq("id", user_id)
-            .execute()
         )
         
         if not response.data or len(response.data) == 0:
@@ -131,11 +114,10 @@ async def update_inventory_items(
     """
     try:
         # Get existing profile
-        existing = (
+        existing = await run_query(
             db.table("profiles")
-            .select("id,items,total_count")
+            .select("id,items")
             .eq("id", str(user_id))
-            .execute()
         )
         
         # Get current items from database
@@ -154,62 +136,33 @@ async def update_inventory_items(
             current_items = {}
         
         # Normalize current items: ensure keys are strings and values are integers
-        normalized_current = {}
-        for k, v in current_items.items():
-            try:
-                key_str = str(k)
-                # Ensure value is an integer
-                if isinstance(v, (int, float)):
-                    val_int = int(v)
-                    if val_int > 0:  # Only keep positive quantities
-                        normalized_current[key_str] = val_int
-            except (ValueError, TypeError):
-                # Skip invalid entries
-                continue
+        normalized_current = normalize_item_quantities(current_items)
         
         # Normalize new items: ensure keys are strings and values are integers
-        normalized_new = {}
-        for k, v in items_update.items.items():
-            try:
-                key_str = str(k)
-                # Ensure value is an integer
-                if isinstance(v, (int, float)):
-                    val_int = int(v)
-                    if val_int > 0:  # Only keep positive quantities
-                        normalized_new[key_str] = val_int
-            except (ValueError, TypeError):
-                # Skip invalid entries
-                continue
+        normalized_new = normalize_item_quantities(items_update.items)
         
         # Merge (new items override existing)
         merged_items = {**normalized_current, **normalized_new}
         
-        # Calculate total count
-        total_count = sum(merged_items.values())
-        
         # Update or insert profile
-        # Note: Database triggers will update total_count and updated_at automatically
+        # Note: Database triggers calculate total_count from items and update updated_at
         if existing.data and len(existing.data) > 0:
             # Update existing profile
-            response = (
+            response = await run_query(
                 db.table("profiles")
                 .update({
-                    "items": merged_items,
-                    "total_count": total_count
+                    "items": merged_items
                 })
                 .eq("id", str(user_id))
-                .execute()
             )
         else:
             # Insert new profile with inventory
-            response = (
+            response = await run_query(
                 db.table("profiles")
                 .insert({
                     "id": str(user_id),
-                    "items": merged_items,
-                    "total_count": total_count
+                    "items": merged_items
                 })
-                .execute()
             )
         
         if not response.data or len(response.data) == 0:
@@ -247,11 +200,10 @@ async def delete_inventory_items(
     """
     try:
         # Get existing profile
-        existing = (
+        existing = await run_query(
             db.table("profiles")
-            .select("id,items,total_count")
+            .select("id,items")
             .eq("id", str(user_id))
-            .execute()
         )
         
         if not existing.data or len(existing.data) == 0:
@@ -269,35 +221,20 @@ async def delete_inventory_items(
             current_items = {}
         
         # Normalize current items: ensure keys are strings
-        normalized_current = {}
-        for k, v in current_items.items():
-            try:
-                key_str = str(k)
-                # Ensure value is an integer
-                if isinstance(v, (int, float)):
-                    val_int = int(v)
-                    if val_int > 0:
-                        normalized_current[key_str] = val_int
-            except (ValueError, TypeError):
-                continue
-        
-        # Convert product_ids to remove to strings
-        product_ids_to_remove = set(str(pid) for pid in items_delete.product_ids)
-        
-        # Remove requested items
-        updated_items = {k: v for k, v in normalized_current.items() if k not in product_ids_to_remove}
+        # (normalize_item_quantities returns a new dict, so it is safe to mutate)
+        updated_items = normalize_item_quantities(current_items)
         
-        # Calculate total count
-        total_count = sum(updated_items.values())
+        # Remove requested items; popping is O(removed) rather than rebuilding the whole map
+        for product_id in {str(pid) for pid in items_delete.product_ids}:
+            updated_items.pop(product_id, None)
         
-        response = (
+        # Database triggers calculate total_count from items
+        response = await run_query(
             db.table("profiles")
             .update({
-                "items": updated_items,
-                "total_count": total_count
+                "items": updated_items
             })
             .eq("id", str(user_id))
-            .execute()
         )
         
         if not response.data or len(response.data) == 0:
@@ -334,11 +271,10 @@ async def get_inventory_stats_by_category(
     """
     try:
         # Get user's profile with inventory
-        profile_response = (
+        profile_response = await run_query(
             db.table("profiles")
             .select("items")
             .eq("id", str(user_id))
-            .execute()
         )
         
         if not profile_response.data or len(profile_response.data) == 0:
@@ -359,11 +295,10 @@ async def get_inventory_stats_by_category(
         batch_size = 1000
         for i in range(0, len(product_ids), batch_size):
             batch = product_ids[i:i + batch_size]
-            products_response = (
+            products_response = await run_query(
                 db.table("products")
                 .select("product_id,category_id")
                 .in_("product_id", batch)
-                .execute()
             )
             if products_response.data:
                 all_products.extend(products_response.data)
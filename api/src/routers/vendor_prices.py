@@ -5,7 +5,7 @@ from typing import Optional, List
 from datetime import datetime
 from fastapi import APIRouter, HTTPException, Depends, Query
 from supabase import Client
-from src.database import get_db_client
+from src.database import get_db_client, run_query
 from src.models import PaginationParams, PaginatedResponse
 
 router = APIRouter(prefix="/vendor-prices", tags=["vendor-prices"])
@@ -32,7 +32,7 @@ async def get_vendor_prices_by_product(
         
         query = (
             db.table("vendor_prices")
-            .select("vendor,title,low_price,high_price,market_price,quickshop_url,fetched_at,product_id")
+            .select("vendor,title,low_price,high_price,market_price,quickshop_url,fetched_at,product_id", count="exact")
             .in_("product_id", product_ids)
         )
         
@@ -40,36 +40,23 @@ async def get_vendor_prices_by_product(
         if vendor:
             query = query.eq("vendor", vendor)
         
-        # Apply sorting and pagination
-        response = (
+        # Apply sorting and pagination; the total comes back with the rows and one extra
+        # row tells whether another page follows
+        response = await run_query(
             query
             .order("product_id", desc=False)
             .order("vendor", desc=False)
             .order("title", desc=False)
-            .range(offset, offset + pagination.limit - 1)
-            .execute()
+            .range(offset, offset + pagination.limit)
         )
-        
-        # Get total count
-        count_query = (
-            db.table("vendor_prices")
-            .select("*", count="exact")
-            .in_("product_id", product_ids)
-        )
-        if vendor:
-            count_query = count_query.eq("vendor", vendor)
-        
-        count_response = count_query.execute()
-        total = count_response.count if count_response.count is not None else None
-        
-        has_more = total is not None and (offset + pagination.limit) < total
+        prices = response.data if response.data else []
         
         return PaginatedResponse(
-            data=response.data,
+            data=prices[:pagination.limit],
             page=pagination.page,
             limit=pagination.limit,
-            total=total,
-            has_more=has_more
+            total=response.count,
+            has_more=len(prices) > pagination.limit
         )
     except HTTPException:
         raise
@@ -108,7 +95,7 @@ async def get_vendor_prices_history_by_product(
         
         query = (
             db.table("vendor_prices_history")
-            .select("id,vendor,title,low_price,high_price,market_price,quickshop_url,fetched_at,product_id")
+            .select("id,vendor,title,low_price,high_price,market_price,quickshop_url,fetched_at,product_id", count="exact")
             .in_("product_id", product_ids)
         )
         
@@ -122,39 +109,22 @@ async def get_vendor_prices_history_by_product(
         if end_date:
             query = query.lte("fetched_at", end_date.isoformat())
         
-        # Apply sorting and pagination
-        response = (
+        # Apply sorting and pagination; the total comes back with the rows and one extra
+        # row tells whether another page follows
+        response = await run_query(
             query
             .order("fetched_at", desc=True)
             .order("id", desc=False)
-            .range(offset, offset + pagination.limit - 1)
-            .execute()
-        )
-        
-        # Get total count
-        count_query = (
-            db.table("vendor_prices_history")
-            .select("*", count="exact")
-            .in_("product_id", product_ids)
+            .range(offset, offset + pagination.limit)
         )
-        if vendor:
-            count_query = count_query.eq("vendor", vendor)
-        if start_date:
-            count_query = count_query.gte("fetched_at", start_date.isoformat())
-        if end_date:
-            count_query = count_query.lte("fetched_at", end_date.isoformat())
-        
-        count_response = count_query.execute()
-        total = count_response.count if count_response.count is not None else None
-        
-        has_more = total is not None and (offset + pagination.limit) < total
+        prices = response.data if response.data else []
         
         return PaginatedResponse(
-            data=response.data,
+            data=prices[:pagination.limit],
             page=pagination.page,
             limit=pagination.limit,
-            total=total,
-            has_more=has_more
+            total=response.count,
+            has_more=len(prices) > pagination.limit
         )
     except HTTPException:
         raise
@@ -1185,7 +1185,7 @@ export const updateDeckListName = async (deckListId, userId, name, options = {})
  * Delete a deck list
  * @param {number} deckListId - Deck list ID
  * @param {string} userId - User ID (UUID)
- * @returns {Promise<Object>} Response object
+ * @returns {Promise<null>} Resolves once the deck list is deleted
  */
 export const deleteDeckList = async (deckListId, userId) => {
   try {
@@ -1207,9 +1207,8 @@ export const deleteDeckList = async (deckListId, userId) => {
       throw new Error(`Failed to delete deck list: ${response.status} ${response.statusText}`);
     }
     
-    const data = await response.json();
-    console.log('Delete deck list response:', data);
-    return data;
+    // Successful deletes return 204 No Content
+    return null;
   } catch (error) {
     console.error('Error deleting deck list:', error);
     throw error;